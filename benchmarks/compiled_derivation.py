@@ -0,0 +1,49 @@
+#!/usr/bin/python3
+"""Benchmark of derivation by grammars compiled with :func:`grammarlab.export.derivation_code.compile_grammar`.
+
+Benchmark derives all configurations of bundled example grammars up to given depth, once by
+interpreted ``direct_derive`` and once by compiled one, and prints speedup of compiled derivation.
+
+.. code-block:: console
+
+    $ python benchmarks/compiled_derivation.py --depth 8 --repeat 5
+
+"""
+
+import argparse
+import copy
+import timeit
+
+from grammarlab.examples import cf_dyck, cs_aaa, kuruda_normal_form, pc_power_of_two, scg_ab
+from grammarlab.export.derivation_code import compile_grammar
+
+EXAMPLES = [cf_dyck, cs_aaa, kuruda_normal_form, pc_power_of_two, scg_ab]
+
+
+def derive_all(grammar, depth):
+    return sum(1 for _ in grammar.derive(depth, only_sentences=False))
+
+
+def measure(grammar, depth, repeat):
+    return min(timeit.repeat(lambda: derive_all(grammar, depth), number=1, repeat=repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-d", "--depth", type=int, default=8, help="Max number of derivation steps")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Number of measurements")
+    args = parser.parse_args()
+
+    for example in EXAMPLES:
+        interpreted = copy.deepcopy(example.grammar)
+        compiled = compile_grammar(copy.deepcopy(example.grammar))
+        configurations = derive_all(interpreted, args.depth)
+        interpreted_time = measure(interpreted, args.depth, args.repeat)
+        compiled_time = measure(compiled, args.depth, args.repeat)
+        name = example.__name__.rsplit(".", 1)[-1]
+        print(f"{name}: configurations: {configurations}, interpreted: {interpreted_time:.4f}s, "
+              f"compiled: {compiled_time:.4f}s, speedup: {interpreted_time / compiled_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
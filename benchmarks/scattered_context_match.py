@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+"""Benchmark of matching scattered context rules.
+
+Grammar constructed by :mod:`grammarlab.transformations.derivation_sequence_in_scg` has long
+sential forms and most of its rules are of order 4 to 7, so matching dominates its derivation.
+Benchmark collects sential forms derived by this grammar and measures time needed to enumerate
+all matches of all rules in every collected sential form.
+
+.. code-block:: console
+
+    $ python benchmarks/scattered_context_match.py --depth 60 --repeat 5
+
+"""
+
+import argparse
+import timeit
+
+from grammarlab.examples.kuruda_normal_form import grammar
+from grammarlab.transformations.derivation_sequence_in_scg import construct_grammar
+
+
+def collect_sential_forms(depth):
+    scg = construct_grammar(grammar)
+    sential_forms = [configuration.sential_form for configuration in scg.derive(depth, only_sentences=False)]
+    return scg, sential_forms
+
+
+def match_all(scg, sential_forms):
+    matches = 0
+    for sential_form in sential_forms:
+        for rule in scg.rules:
+            for _ in rule.match(sential_form):
+                matches += 1
+    return matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-d", "--depth", type=int, default=60, help="Max number of derivation steps")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Number of measurements")
+    args = parser.parse_args()
+
+    scg, sential_forms = collect_sential_forms(args.depth)
+    longest = max(len(sential_form) for sential_form in sential_forms)
+    matches = match_all(scg, sential_forms)
+    times = timeit.repeat(lambda: match_all(scg, sential_forms), number=1, repeat=args.repeat)
+
+    print(f"rules: {len(scg.rules)}, sential forms: {len(sential_forms)}, longest: {longest}, matches: {matches}")
+    print(f"best: {min(times):.4f}s, mean: {sum(times) / len(times):.4f}s")
+
+
+if __name__ == "__main__":
+    main()
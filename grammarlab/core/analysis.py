@@ -0,0 +1,725 @@
+"""Static analysis of grammars used to prune derivation.
+
+Functions in this module work with context-free productions, pairs of non-terminal and string
+it is rewritten to. They don't depend on grammar classes, so they can be used by grammars
+and transformations alike.
+
+"""
+
+import math
+from collections import defaultdict
+from heapq import heapify, heappop, heappush
+from itertools import count as count_from
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from grammarlab.core.common import Symbol, SymbolType, epsilon
+
+Production = Tuple[Symbol, Sequence[Symbol]]
+"""Context-free production, non-terminal and symbols it is rewritten to."""
+
+
+class _Closure:
+    """Closed set of symbols extended by left sides of productions whose right side symbols are all closed or satisfied.
+
+    Every production counts its symbols that are not closed yet. When symbol is closed,
+    counters of productions waiting for it are decreased, so every production is visited
+    once per symbol of its right side. Counters are kept, so productions can be added later.
+
+    """
+    def __init__(self, closed: Set[Symbol], satisfied: Callable[[Symbol], bool]):
+        self.closed = closed
+        self._satisfied = satisfied
+        self._waiting = defaultdict(list)
+        """Productions waiting for symbol, once for every occurrence of symbol."""
+        self._remaining = []
+        self._lhs = []
+
+    def add(self, productions: Iterable[Production]) -> List[Symbol]:
+        """Add productions, return symbols closed by them."""
+        closed = self.closed
+        waiting = self._waiting
+        remaining = self._remaining
+        worklist = []
+        for lhs, rhs in productions:
+            if lhs in closed:
+                continue
+            count = 0
+            for symbol in rhs:
+                if symbol not in closed and not self._satisfied(symbol):
+                    waiting[symbol].append(len(remaining))
+                    count += 1
+            remaining.append(count)
+            self._lhs.append(lhs)
+            if not count:
+                closed.add(lhs)
+                worklist.append(lhs)
+
+        added = list(worklist)
+        while worklist:
+            for index in waiting.pop(worklist.pop(), ()):
+                remaining[index] -= 1
+                if not remaining[index]:
+                    lhs = self._lhs[index]
+                    if lhs not in closed:
+                        closed.add(lhs)
+                        worklist.append(lhs)
+                        added.append(lhs)
+        return added
+
+
+class _Reachability:
+    """Symbols reachable from start symbol, every production is visited once."""
+    def __init__(self, start_symbol: Symbol, reachable: Iterable[Symbol] = ()):
+        self.reachable = set(reachable) | {start_symbol}
+        self._successors = defaultdict(list)
+        """Right sides of productions of symbols that are not reachable yet."""
+
+    def add(self, productions: Iterable[Production]):
+        """Add productions and extend reachable symbols."""
+        worklist = []
+        for lhs, rhs in productions:
+            if lhs in self.reachable:
+                self._reach(rhs, worklist)
+            else:
+                self._successors[lhs].append(rhs)
+        while worklist:
+            for rhs in self._successors.pop(worklist.pop(), ()):
+                self._reach(rhs, worklist)
+
+    def _reach(self, rhs: Sequence[Symbol], worklist: List[Symbol]):
+        for symbol in rhs:
+            if symbol not in self.reachable:
+                self.reachable.add(symbol)
+                worklist.append(symbol)
+
+
+class _UnitPairs:
+    """Unit pairs indexed by both their symbols, so pairs of new unit production are added without closure."""
+    def __init__(self, non_terminals: Iterable[Symbol], pairs: Set[Tuple[Symbol, Symbol]]):
+        self.non_terminals = set(non_terminals)
+        self.pairs = pairs
+        self._targets = defaultdict(set)
+        self._sources = defaultdict(set)
+        for source, target in pairs:
+            self._targets[source].add(target)
+            self._sources[target].add(source)
+
+    def add(self, productions: Iterable[Production]):
+        """Add pairs created by unit productions."""
+        for lhs, rhs in productions:
+            if len(rhs) != 1 or rhs[0] not in self.non_terminals or rhs[0] in self._targets[lhs]:
+                continue
+            # every symbol that derives lhs now derives every symbol derived from right side
+            sources = self._sources[lhs] | {lhs}
+            targets = self._targets[rhs[0]] | {rhs[0]}
+            for source in sources:
+                for target in targets - self._targets[source]:
+                    self.pairs.add((source, target))
+                    self._targets[source].add(target)
+                    self._sources[target].add(source)
+
+
+class _FirstSets:
+    """First sets propagated along edges from non-terminals of right sides to left sides.
+
+    Production is scanned until its first symbol that is not nullable. Scan is continued
+    when that symbol becomes nullable, so edges are only added.
+
+    """
+    def __init__(self, nullable: Set[Symbol], first: Dict[Symbol, Set[Symbol]]):
+        self.nullable = nullable
+        self.first = first
+        self._edges = defaultdict(list)
+        """Left sides first set of symbol flows to."""
+        self._blocked = defaultdict(list)
+        """Productions whose scan stopped at symbol, with position of symbol."""
+
+    def add(self, productions: Iterable[Production]) -> Set[Symbol]:
+        """Add productions, return symbols whose first sets grew."""
+        worklist = []
+        changed = set()
+        for lhs, rhs in productions:
+            self._scan(lhs, rhs, 0, worklist, changed)
+        return self._propagate(worklist, changed)
+
+    def add_nullable(self, symbols: Iterable[Symbol]) -> Set[Symbol]:
+        """Continue scans stopped at symbols that became nullable, return symbols whose first sets grew."""
+        worklist = []
+        changed = set()
+        for symbol in symbols:
+            for lhs, rhs, position in self._blocked.pop(symbol, ()):
+                self._scan(lhs, rhs, position + 1, worklist, changed)
+        return self._propagate(worklist, changed)
+
+    def _scan(self, lhs: Symbol, rhs: Sequence[Symbol], start: int, worklist: List[Symbol], changed: Set[Symbol]):
+        lhs_first = self.first.setdefault(lhs, set())
+        for position in range(start, len(rhs)):
+            symbol = rhs[position]
+            if symbol.type == SymbolType.TERMINAL:
+                if symbol not in lhs_first:
+                    lhs_first.add(symbol)
+                    worklist.append(lhs)
+                    changed.add(lhs)
+                return
+            self._edges[symbol].append(lhs)
+            if self.first.get(symbol):
+                worklist.append(symbol)
+            if symbol not in self.nullable:
+                self._blocked[symbol].append((lhs, rhs, position))
+                return
+
+    def _propagate(self, worklist: List[Symbol], changed: Set[Symbol]) -> Set[Symbol]:
+        """Propagate sets of symbols in worklist, symbol is revisited only when its set grows."""
+        first = self.first
+        while worklist:
+            source = worklist.pop()
+            items = first[source]
+            for target in self._edges.get(source, ()):
+                target_items = first.setdefault(target, set())
+                if not items <= target_items:
+                    target_items |= items
+                    worklist.append(target)
+                    changed.add(target)
+        return changed
+
+
+class _FollowSets:
+    """Follow sets propagated along edges from left sides and from first sets of following symbols.
+
+    Edges only grow when symbols become nullable or first sets grow, so productions that contain
+    new nullable symbols are scanned again and grown first sets are propagated along their edges.
+
+    """
+    def __init__(
+        self,
+        start_symbol: Symbol,
+        nullable: Set[Symbol],
+        first: Dict[Symbol, Set[Symbol]],
+        follow: Dict[Symbol, Set[Symbol]],
+    ):
+        self.nullable = nullable
+        self.first = first
+        self.follow = follow
+        follow.setdefault(start_symbol, set()).add(epsilon)
+        self._edges = defaultdict(set)
+        """Symbols follow set of left side flows to."""
+        self._first_edges = defaultdict(set)
+        """Symbols first set of symbol flows to."""
+        self._occurrences = defaultdict(list)
+        """Productions that contain non-terminal in their right side."""
+
+    def add(self, productions: Iterable[Production]):
+        """Add productions and extend follow sets."""
+        worklist = []
+        for production in productions:
+            for symbol in set(production[1]):
+                if symbol.type != SymbolType.TERMINAL:
+                    self._occurrences[symbol].append(production)
+            self._scan(production, worklist)
+        self._propagate(worklist)
+
+    def add_nullable(self, symbols: Iterable[Symbol]):
+        """Scan again productions that contain symbols that became nullable."""
+        worklist = []
+        scanned = set()
+        for symbol in symbols:
+            for production in self._occurrences.get(symbol, ()):
+                if id(production) not in scanned:
+                    scanned.add(id(production))
+                    self._scan(production, worklist)
+        self._propagate(worklist)
+
+    def add_first(self, symbols: Iterable[Symbol]):
+        """Propagate first sets of symbols that grew."""
+        worklist = []
+        for symbol in symbols:
+            items = self.first.get(symbol, ())
+            for target in self._first_edges.get(symbol, ()):
+                self._update(target, items, worklist)
+        self._propagate(worklist)
+
+    def _scan(self, production: Production, worklist: List[Symbol]):
+        lhs, rhs = production
+        # terminal and nullable prefix of suffix of right side that can follow current symbol
+        terminal = None
+        following = []
+        nullable_suffix = True
+        for symbol in reversed(rhs):
+            if symbol.type == SymbolType.TERMINAL:
+                terminal = symbol
+                following = []
+                nullable_suffix = False
+                continue
+            symbol_follow = self.follow.setdefault(symbol, set())
+            if terminal is not None and terminal not in symbol_follow:
+                symbol_follow.add(terminal)
+                worklist.append(symbol)
+            for next_symbol in following:
+                if symbol not in self._first_edges[next_symbol]:
+                    self._first_edges[next_symbol].add(symbol)
+                    self._update(symbol, self.first.get(next_symbol, ()), worklist)
+            if nullable_suffix and symbol not in self._edges[lhs]:
+                self._edges[lhs].add(symbol)
+                self._update(symbol, self.follow.get(lhs, ()), worklist)
+            if symbol in self.nullable:
+                following.append(symbol)
+            else:
+                terminal = None
+                following = [symbol]
+                nullable_suffix = False
+
+    def _update(self, target: Symbol, items: Iterable[Symbol], worklist: List[Symbol]):
+        target_items = self.follow.setdefault(target, set())
+        if not target_items.issuperset(items):
+            target_items.update(items)
+            worklist.append(target)
+
+    def _propagate(self, worklist: List[Symbol]):
+        """Propagate sets of symbols in worklist, symbol is revisited only when its set grows."""
+        while worklist:
+            source = worklist.pop()
+            items = self.follow[source]
+            for target in self._edges.get(source, ()):
+                self._update(target, items, worklist)
+
+
+class _MinimumYields:
+    """Minimum yields with productions indexed by non-terminals of their right sides.
+
+    New production can only decrease yields, decreased yields are propagated in order of their
+    length as in Dijkstra's algorithm, production is evaluated again when yield of its symbol decreases.
+
+    """
+    def __init__(self, productions: List[Production], yields: Dict[Symbol, float]):
+        self.yields = yields
+        self._productions = []
+        self._occurrences = defaultdict(list)
+        self._index(productions)
+
+    def _index(self, productions: Iterable[Production]):
+        for production in productions:
+            for symbol in production[1]:
+                if symbol in self.yields:
+                    self._occurrences[symbol].append(len(self._productions))
+            self._productions.append(production)
+
+    def _value(self, rhs: Sequence[Symbol]) -> float:
+        get = self.yields.get
+        return sum(get(symbol, 1) for symbol in rhs)
+
+    def add(self, productions: List[Production]):
+        """Add productions whose left sides already have yield and decrease yields."""
+        yields = self.yields
+        self._index(productions)
+        order = count_from()
+        heap = []
+        for lhs, rhs in productions:
+            value = self._value(rhs)
+            if value < yields[lhs]:
+                yields[lhs] = value
+                heappush(heap, (value, next(order), lhs))
+
+        while heap:
+            length, _, symbol = heappop(heap)
+            if length > yields[symbol]:
+                continue
+            for index in self._occurrences.get(symbol, ()):
+                lhs, rhs = self._productions[index]
+                value = self._value(rhs)
+                if value < yields[lhs]:
+                    yields[lhs] = value
+                    heappush(heap, (value, next(order), lhs))
+
+
+def minimum_yields(
+    productions: Iterable[Production],
+    non_terminals: Iterable[Symbol] = (),
+    yields: Optional[Dict[Symbol, float]] = None,
+) -> Dict[Symbol, float]:
+    """Minimal length of sentence derivable from every non-terminal.
+
+    Lengths are computed by Knuth's generalisation of Dijkstra's algorithm: non-terminal with
+    the lowest tentative yield is final, production is evaluated once all non-terminals of its right
+    side are final. Terminals yield exactly one symbol. Non-terminals that derive no sentence
+    yield ``math.inf``.
+
+    Args:
+        productions: Context-free productions of grammar.
+        non_terminals: Non-terminals of grammar, also those without productions. Terminals among them
+            are skipped, some grammars list terminals in their non-terminal alphabet.
+        yields: Yields computed for subset of productions, search starts from them.
+
+    Returns:
+        Minimal yield of every non-terminal.
+
+    Examples:
+        >>> from grammarlab.core.common import NonTerminal, Terminal
+        >>> S, A, B = NonTerminal("S"), NonTerminal("A"), NonTerminal("B")
+        >>> a = Terminal("a")
+        >>> yields = minimum_yields([(S, [A, A]), (S, [a, B]), (A, [a]), (A, [a, A]), (B, [B])])
+        >>> yields[S], yields[A], yields[B]
+        (2, 1, inf)
+
+    """
+    productions = list(productions)
+    yields = dict(yields or {})
+    for symbol in non_terminals:
+        if symbol.type != SymbolType.TERMINAL:
+            yields.setdefault(symbol, math.inf)
+    for lhs, _ in productions:
+        yields.setdefault(lhs, math.inf)
+
+    waiting = defaultdict(list)
+    remaining = []
+    constant = []
+    """Length of symbols of right side that are not non-terminals of grammar."""
+    for index, (_, rhs) in enumerate(productions):
+        count = 0
+        length = 0
+        for symbol in rhs:
+            if symbol in yields:
+                waiting[symbol].append(index)
+                count += 1
+            else:
+                length += 1
+        remaining.append(count)
+        constant.append(length)
+
+    order = count_from()
+    heap = [(length, next(order), symbol) for symbol, length in yields.items() if length < math.inf]
+    for index, (lhs, _) in enumerate(productions):
+        if not remaining[index] and constant[index] < yields[lhs]:
+            yields[lhs] = constant[index]
+            heap.append((constant[index], next(order), lhs))
+    heapify(heap)
+
+    final = set()
+    while heap:
+        length, _, symbol = heappop(heap)
+        if symbol in final or length > yields[symbol]:
+            continue
+        final.add(symbol)
+        for index in waiting.pop(symbol, ()):
+            remaining[index] -= 1
+            if remaining[index]:
+                continue
+            lhs, rhs = productions[index]
+            value = constant[index] + sum(yields[symbol] for symbol in rhs if symbol in yields)
+            if value < yields[lhs]:
+                yields[lhs] = value
+                heappush(heap, (value, next(order), lhs))
+    return yields
+
+
+def generating_symbols(productions: Iterable[Production], generating: Iterable[Symbol] = ()) -> Set[Symbol]:
+    """Non-terminals from which sentence can be derived.
+
+    Args:
+        productions: Context-free productions of grammar.
+        generating: Non-terminals known or assumed to be generating, e.g. communication symbols
+            of PC grammar systems.
+
+    Returns:
+        Set of generating non-terminals, including the given ones.
+
+    Examples:
+        >>> from grammarlab.core.common import NonTerminal, Terminal
+        >>> S, A, B = NonTerminal("S"), NonTerminal("A"), NonTerminal("B")
+        >>> sorted(str(symbol) for symbol in generating_symbols([(S, [A]), (S, [B]), (A, [Terminal("a")]), (B, [B])]))
+        ['A', 'S']
+
+    """
+    closure = _Closure(set(generating), lambda symbol: symbol.type == SymbolType.TERMINAL)
+    closure.add(productions)
+    return closure.closed
+
+
+def nullable_symbols(productions: Iterable[Production], nullable: Iterable[Symbol] = ()) -> Set[Symbol]:
+    """Non-terminals from which empty string can be derived.
+
+    Args:
+        productions: Context-free productions of grammar.
+        nullable: Non-terminals known to be nullable.
+
+    """
+    closure = _Closure(set(nullable), lambda symbol: False)
+    closure.add(productions)
+    return closure.closed
+
+
+def reachable_symbols(productions: Iterable[Production], start_symbol: Symbol, reachable: Iterable[Symbol] = ()) -> Set[Symbol]:
+    """Symbols that appear in some sential form derived from start symbol.
+
+    Symbols are searched in graph of productions, every production is visited once.
+
+    Args:
+        productions: Context-free productions of grammar.
+        start_symbol: Start symbol of grammar.
+        reachable: Symbols known to be reachable.
+
+    """
+    reachability = _Reachability(start_symbol, reachable)
+    reachability.add(productions)
+    return reachability.reachable
+
+
+def unit_pairs(
+    productions: Iterable[Production],
+    non_terminals: Iterable[Symbol],
+    pairs: Iterable[Tuple[Symbol, Symbol]] = (),
+) -> Set[Tuple[Symbol, Symbol]]:
+    """Pairs ``(A, B)`` of non-terminals such that B can be derived from A by unit productions only.
+
+    Pairs are transitive closure of graph of unit productions. Closure is computed by Warshall's
+    algorithm over bitsets of non-terminals that occur in unit productions.
+
+    Args:
+        productions: Context-free productions of grammar.
+        non_terminals: Non-terminals of grammar, every non-terminal forms pair with itself.
+        pairs: Pairs known to be unit pairs.
+
+    """
+    non_terminals = set(non_terminals)
+    edges = [(lhs, rhs[0]) for lhs, rhs in productions if len(rhs) == 1 and rhs[0] in non_terminals]
+    edges.extend(pair for pair in pairs if pair[0] != pair[1])
+
+    bits = {}
+    for lhs, rhs in edges:
+        bits.setdefault(lhs, len(bits))
+        bits.setdefault(rhs, len(bits))
+    symbols = list(bits)
+    reach = [0] * len(symbols)
+    for lhs, rhs in edges:
+        reach[bits[lhs]] |= 1 << bits[rhs]
+    for k in range(len(reach)):
+        k_bit = 1 << k
+        for i, i_reach in enumerate(reach):
+            if i_reach & k_bit:
+                reach[i] = i_reach | reach[k]
+
+    result = {(symbol, symbol) for symbol in non_terminals}
+    result.update(pair for pair in pairs if pair[0] == pair[1])
+    for i, i_reach in enumerate(reach):
+        j = 0
+        while i_reach:
+            if i_reach & 1:
+                result.add((symbols[i], symbols[j]))
+            i_reach >>= 1
+            j += 1
+    return result
+
+
+def first_sets(
+    productions: Iterable[Production],
+    nullable: Set[Symbol],
+    first: Optional[Dict[Symbol, Set[Symbol]]] = None,
+) -> Dict[Symbol, Set[Symbol]]:
+    """Terminals that can start sentence derived from every non-terminal.
+
+    First set of non-terminal of right side flows to left side if all symbols before it are nullable.
+    Sets are propagated along these edges by worklist.
+
+    Args:
+        productions: Context-free productions of grammar.
+        nullable: Nullable non-terminals of grammar.
+        first: First sets computed for subset of productions, propagation starts from them.
+
+    """
+    sets = _FirstSets(nullable, {symbol: set(terminals) for symbol, terminals in (first or {}).items()})
+    sets.add(productions)
+    return sets.first
+
+
+def follow_sets(
+    productions: Iterable[Production],
+    start_symbol: Symbol,
+    nullable: Set[Symbol],
+    first: Dict[Symbol, Set[Symbol]],
+    follow: Optional[Dict[Symbol, Set[Symbol]]] = None,
+) -> Dict[Symbol, Set[Symbol]]:
+    """Terminals that can follow every non-terminal in sential form derived from start symbol.
+
+    End of sentential form is represented by epsilon, so it is in follow set of start symbol.
+    First sets of following symbols are added directly, follow set of left side flows to non-terminals
+    followed only by nullable symbols. Sets are propagated along these edges by worklist.
+
+    Args:
+        productions: Context-free productions of grammar.
+        start_symbol: Start symbol of grammar.
+        nullable: Nullable non-terminals of grammar.
+        first: First sets of non-terminals.
+        follow: Follow sets computed for subset of productions, propagation starts from them.
+
+    """
+    sets = _FollowSets(
+        start_symbol, nullable, first, {symbol: set(terminals) for symbol, terminals in (follow or {}).items()}
+    )
+    sets.add(productions)
+    return sets.follow
+
+
+def minimum_length(symbols: Iterable[Symbol], yields: Dict[Symbol, float]) -> float:
+    """Lower bound of length of sentence derivable from symbols, symbols without yield yield one symbol."""
+    get = yields.get
+    return sum(get(symbol, 1) for symbol in symbols)
+
+
+class GrammarAnalysis:
+    """Static facts about grammar, every fact is computed when it is needed for the first time.
+
+    Facts are computed from context-free productions of grammar, see :meth:`Rule.productions`.
+    Worklists of computed facts are kept, so when rule is added by :meth:`add_rule`, only productions
+    of the new rule are propagated through them. All facts only grow (or shrink for yields).
+    Grammar drops its analysis when its rules or alphabets are replaced.
+
+    Examples:
+        >>> from grammarlab.grammars import CF
+        >>> grammar = CF({"S", "A"}, {"a"}, [("S", "aA"), ("A", "")], "S")
+        >>> sorted(str(symbol) for symbol in grammar.analysis.nullable)
+        ['A']
+        >>> grammar.analysis.minimum_yields[grammar.start_symbol]
+        1
+
+    """
+    def __init__(self, grammar):
+        self.grammar = grammar
+        self._facts = {}
+        """Computed facts by name."""
+        self._states = {}
+        """Fixpoint iterations of computed facts by name, they are continued by :meth:`add_rule`."""
+        self._productions = None
+        self._productions_known = False
+
+    @property
+    def productions(self) -> Optional[List[Production]]:
+        """Context-free productions of grammar, None if some rule can't be performed by them."""
+        if not self._productions_known:
+            self._productions = self.grammar.productions()
+            self._productions_known = True
+        return self._productions
+
+    @property
+    def context_free(self) -> bool:
+        """Check if every rule can be performed by context-free productions."""
+        return self.productions is not None
+
+    def _fact(self, name, compute):
+        if name not in self._facts:
+            if self.productions is None:
+                raise ValueError(f"Grammar has rules that are not context-free, {name} can't be computed!")
+            self._facts[name] = compute()
+        return self._facts[name]
+
+    def _closure(self, name: str, satisfied: Callable[[Symbol], bool]) -> Set[Symbol]:
+        closure = self._states[name] = _Closure(set(), satisfied)
+        closure.add(self.productions)
+        return closure.closed
+
+    def _compute_reachable(self) -> Set[Symbol]:
+        reachability = self._states["reachable"] = _Reachability(self.grammar.start_symbol)
+        reachability.add(self.productions)
+        return reachability.reachable
+
+    def _compute_unit_pairs(self) -> Set[Tuple[Symbol, Symbol]]:
+        non_terminals = self.grammar.non_terminals
+        pairs = self._states["unit_pairs"] = _UnitPairs(non_terminals, unit_pairs(self.productions, non_terminals))
+        return pairs.pairs
+
+    def _compute_first(self) -> Dict[Symbol, Set[Symbol]]:
+        sets = self._states["first"] = _FirstSets(self.nullable, {})
+        sets.add(self.productions)
+        return sets.first
+
+    def _compute_follow(self) -> Dict[Symbol, Set[Symbol]]:
+        sets = self._states["follow"] = _FollowSets(self.grammar.start_symbol, self.nullable, self.first, {})
+        sets.add(self.productions)
+        return sets.follow
+
+    def _compute_minimum_yields(self) -> Dict[Symbol, float]:
+        yields = minimum_yields(self.productions, self.grammar.non_terminals)
+        self._states["minimum_yields"] = _MinimumYields(self.productions, yields)
+        return yields
+
+    @property
+    def nullable(self) -> Set[Symbol]:
+        """Non-terminals from which empty string can be derived."""
+        return self._fact("nullable", lambda: self._closure("nullable", lambda symbol: False))
+
+    @property
+    def generating(self) -> Set[Symbol]:
+        """Non-terminals from which sentence can be derived."""
+        return self._fact(
+            "generating", lambda: self._closure("generating", lambda symbol: symbol.type == SymbolType.TERMINAL)
+        )
+
+    @property
+    def reachable(self) -> Set[Symbol]:
+        """Symbols reachable from start symbol."""
+        return self._fact("reachable", self._compute_reachable)
+
+    @property
+    def unit_pairs(self) -> Set[Tuple[Symbol, Symbol]]:
+        """Pairs of non-terminals connected by unit productions."""
+        return self._fact("unit_pairs", self._compute_unit_pairs)
+
+    @property
+    def first(self) -> Dict[Symbol, Set[Symbol]]:
+        """First sets of non-terminals."""
+        return self._fact("first", self._compute_first)
+
+    @property
+    def follow(self) -> Dict[Symbol, Set[Symbol]]:
+        """Follow sets of non-terminals."""
+        return self._fact("follow", self._compute_follow)
+
+    @property
+    def minimum_yields(self) -> Dict[Symbol, float]:
+        """Minimal length of sentence derivable from every non-terminal."""
+        return self._fact("minimum_yields", self._compute_minimum_yields)
+
+    def add_rule(self, rule):
+        """Update computed facts after rule was added to grammar.
+
+        Productions of rule are propagated from the state in which fixpoint iteration of every fact ended.
+        If productions were not loaded yet, they are loaded with the rule later, so there is nothing to update.
+
+        """
+        if not self._productions_known:
+            return
+        new_productions = rule.productions()
+        if self._productions is None or new_productions is None:
+            self.invalidate()
+            return
+        self._productions.extend(new_productions)
+
+        states = self._states
+        # facts are updated in order of their dependencies
+        new_nullable = states["nullable"].add(new_productions) if "nullable" in states else []
+        if "generating" in states:
+            states["generating"].add(new_productions)
+        if "reachable" in states:
+            states["reachable"].add(new_productions)
+        if "unit_pairs" in states:
+            states["unit_pairs"].add(new_productions)
+        changed_first = set()
+        if "first" in states:
+            changed_first = states["first"].add(new_productions) | states["first"].add_nullable(new_nullable)
+        if "follow" in states:
+            states["follow"].add(new_productions)
+            states["follow"].add_nullable(new_nullable)
+            states["follow"].add_first(changed_first)
+        if "minimum_yields" in states:
+            yields = states["minimum_yields"].yields
+            if all(lhs in yields for lhs, _ in new_productions):
+                states["minimum_yields"].add(new_productions)
+            else:
+                # symbol that was not non-terminal of grammar became one, yields are computed again
+                del states["minimum_yields"]
+                del self._facts["minimum_yields"]
+
+    def invalidate(self):
+        """Drop all computed facts."""
+        self._facts.clear()
+        self._states.clear()
+        self._productions = None
+        self._productions_known = False
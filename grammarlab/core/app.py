@@ -84,6 +84,7 @@ class App:
         subparsers = parser.add_subparsers(dest="command")
         generate_parser = subparsers.add_parser("generate", help="Generate language of the grammar")
         generate_parser.add_argument("-d", "--depth", type=int, help="Max number of derivation steps")
+        generate_parser.add_argument("-l", "--max-length", type=int, help="Max length of generated sentences")
         generate_parser.add_argument("-e", "--exact-depth", action="store_true", help="Generate only sentences with exact depth")
         generate_parser.add_argument("-s", "--show-sential-forms", action="store_true", help="Show sential forms")
         generate_parser.add_argument("-a", "--axiom", type=str, help="Start derivation from this sential form")
@@ -123,6 +124,7 @@ class App:
                 axiom=args.axiom,
                 delimiter=args.delimiter,
                 verbose=args.verbose,
+                max_length=args.max_length,
             )
         elif args.command == "derivation_sequence":
             self.derivation_sequence(args.sentence, args.delimiter, args.matches)
@@ -139,6 +141,7 @@ class App:
         axiom: Optional[str] = None,
         delimiter: str = "",
         verbose: bool = False,
+        max_length: Optional[int] = None,
     ):
         """Generate sentences from the grammar.
 
@@ -149,6 +152,8 @@ class App:
             axiom: Axiom to start derivation from. If None, grammar's start symbol will be used.
             delimiter: Delimiter used to separate symbols in axiom
             verbose: If True, full configuration representation will be printed.
+            max_length: Maximum length of generated sentences. Sential forms that can't derive
+                sentence of at most this length are not expanded.
         Side effects:
             prints generated sentences to stdout.
 
@@ -157,7 +162,10 @@ class App:
             axiom = self.text_load.get_loader(self.grammar.configuration_class)(
                 axiom, self.grammar, delimiter=delimiter
             )
-        for configuration in self.grammar.derive(max_steps, exact_depth, only_sentences=only_sentences, axiom=axiom):
+        derivation = self.grammar.derive(
+            max_steps, exact_depth, only_sentences=only_sentences, axiom=axiom, max_length=max_length
+        )
+        for configuration in derivation:
             print(self.cli_export.export(configuration if verbose else configuration.sential_form))
 
     def derivation_sequence(
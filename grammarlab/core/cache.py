@@ -0,0 +1,108 @@
+"""Bounded caches used to speed up derivation.
+
+"""
+
+from collections import OrderedDict, namedtuple
+from typing import Callable
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+"""Statistics of cache in the same format as :func:`functools.lru_cache` uses."""
+
+
+class LRUCache:
+    """Cache with bounded number of entries.
+
+    When cache is full, least recently used entry is evicted.
+    Cache counts hits and misses of :meth:`get`, so its size can be tuned.
+
+    Examples:
+        >>> cache = LRUCache(maxsize=1)
+        >>> cache.put("a", 1)
+        >>> cache.get("a")
+        1
+        >>> cache.put("b", 2)
+        >>> cache.get("a") is None
+        True
+        >>> cache.info()
+        CacheInfo(hits=1, misses=1, maxsize=1, currsize=1)
+
+    """
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        """Return cached value and mark it as recently used.
+
+        Args:
+            key: Key of the entry.
+            default: Value returned if key is not cached.
+
+        """
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Cache value, least recently used entry is evicted if cache is full."""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all entries and reset statistics."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Ratio of hits to all lookups. Zero if cache wasn't used yet."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def info(self) -> CacheInfo:
+        """Return statistics of cache."""
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
+
+
+class SuccessorCache(LRUCache):
+    """LRU cache of configurations derived from configuration in one step.
+
+    Only data of successors are cached. Cached successors are replayed as new configurations
+    with the requested configuration as their parent, so derivation sequences stay correct.
+
+    """
+    def successors(self, key, configuration, direct_derive: Callable) -> list:
+        """Return successors of configuration, derive and cache them if key is not cached.
+
+        Args:
+            key: Key that determines successors of configuration.
+            configuration: Configuration to derive.
+            direct_derive: Function that derives successors of configuration.
+
+        """
+        cached = self.get(key)
+        if cached is None:
+            successors = list(direct_derive(configuration))
+            self.put(key, [(s.__class__, s.data, s.used_rule, s.affected) for s in successors])
+            return successors
+        depth = configuration.depth + 1
+        return [
+            configuration_class(data, configuration, used_rule, affected, depth)
+            for configuration_class, data, used_rule, affected in cached
+        ]
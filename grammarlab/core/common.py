@@ -3,6 +3,7 @@
 """
 
 import logging
+import threading
 from collections import defaultdict
 from enum import Enum
 
@@ -58,6 +59,10 @@ class Symbol:
     def __hash__(self):
         return hash(self.id)
 
+    def __reduce__(self):
+        # symbols are created again by constructor, so unpickled symbols are cached too
+        return Symbol, (self.id, self.type)
+
     def __repr__(self):
         return f"{self.__class__.__name__}(id={self.id}, type={self.type})"
 
@@ -170,10 +175,48 @@ class Alphabet:
         return self._symbol_lookup[raw_symbol]
 
 
+HASH_MODULUS = (1 << 61) - 1
+"""Prime modulus of polynomial hash of strings."""
+HASH_BASE = 1_000_003
+"""Base of polynomial hash of strings."""
+_HASH_BASE_INVERSE = pow(HASH_BASE, -1, HASH_MODULUS)
+_powers = {1: [1], -1: [1]}
+"""Cached powers of base (key 1) and of its inverse (key -1) modulo :const:`HASH_MODULUS`."""
+_powers_lock = threading.Lock()
+
+
+def _power(exponent: int) -> int:
+    """``HASH_BASE ** exponent`` modulo :const:`HASH_MODULUS`, negative exponent is power of inverse of base."""
+    sign = 1 if exponent >= 0 else -1
+    powers = _powers[sign]
+    exponent = abs(exponent)
+    if exponent >= len(powers):
+        base = HASH_BASE if sign == 1 else _HASH_BASE_INVERSE
+        with _powers_lock:
+            while exponent >= len(powers):
+                powers.append(powers[-1] * base % HASH_MODULUS)
+    return powers[exponent]
+
+
+def _polynomial_hash(symbols: list, start: int = 0, end: int = None) -> int:
+    """Polynomial hash of ``symbols[start:end]``, symbol at ``start`` has the lowest power of base."""
+    value = 0
+    for position in range(len(symbols) if end is None else end, start, -1):
+        value = (value * HASH_BASE + hash(symbols[position - 1].id)) % HASH_MODULUS
+    return value
+
+
 class String:
     """Class representing a sequences of symbols.
 
     Epsilon is automatically removed from the string.
+    Strings are hashable. Polynomial hash of string is computed when it is needed for the first time,
+    then it is updated by :meth:`replace` and :meth:`expand` and strings created by :meth:`rewrite`
+    derive it from hash of rewritten string. Rewritten string keeps hashes of its prefixes,
+    so hash of every string derived from it is computed only from hashes of inserted strings.
+
+    Hash and index are not updated when list :attr:`symbols` is modified directly, so it must
+    be modified only by :meth:`replace` and :meth:`expand`.
 
     Examples:
         >>> string1 = String([Terminal("a")])
@@ -190,14 +233,31 @@ class String:
     def __init__(self, symbols: list[Symbol]):
         # Remove epsilon from string
         self.symbols = list(filter(lambda symbol: symbol != epsilon, symbols))
+        self._hash = None
+        self._prefix_hashes = None
         self.index = None
         """Index of the string.
 
         The index is a dictionary mapping symbols to their positions in the string.
+        Positions of every symbol are sorted in ascending order.
 
         """
         self._create_index()
 
+    @classmethod
+    def _from_symbols(cls, symbols: list[Symbol]) -> "String":
+        """Create string from list of symbols without filtering epsilon.
+
+        List is used directly (not copied), so it must not be shared with other strings.
+
+        """
+        string = cls.__new__(cls)
+        string.symbols = symbols
+        string._hash = None
+        string._prefix_hashes = None
+        string._create_index()
+        return string
+
     @property
     def is_sentence(self):
         """Check if the string is a sentence.
@@ -221,7 +281,53 @@ class String:
         return " ".join(map(str, self.symbols))
 
     def __eq__(self, other):
-        return isinstance(other, String) and self.symbols == other.symbols
+        if not isinstance(other, String):
+            return False
+        if self._hash is not None and other._hash is not None and self._hash != other._hash:
+            return False
+        return self.symbols == other.symbols
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = _polynomial_hash(self.symbols)
+        return self._hash
+
+    def prefix_hashes(self) -> list[int]:
+        """Hashes of all prefixes of string, ``prefix_hashes()[k]`` is hash of ``symbols[:k]``.
+
+        Hashes are computed once, strings rewritten from this string use them to compute their hash.
+
+        """
+        if self._prefix_hashes is None:
+            value = 0
+            prefix_hashes = [0]
+            for position, symbol in enumerate(self.symbols):
+                value = (value + hash(symbol.id) * _power(position)) % HASH_MODULUS
+                prefix_hashes.append(value)
+            self._prefix_hashes = prefix_hashes
+            self._hash = value
+        return self._prefix_hashes
+
+    def _rewritten_hash(self, positions: list[int], strings: list["String"], expand_symbols: int) -> int:
+        """Hash of string in which ``expand_symbols`` symbols at every position were rewritten to strings.
+
+        Unchanged parts are taken from :meth:`prefix_hashes` and shifted, so besides them only hashes
+        of inserted strings are needed. Hashes of strings are cached, inserted strings are usually
+        right sides of rules.
+
+        """
+        prefix_hashes = self.prefix_hashes()
+        value = 0
+        previous = 0  # position in this string after the last rewritten part
+        offset = 0  # position in rewritten string after the last inserted string
+        for position, string in zip(positions, strings):
+            unchanged = (prefix_hashes[position] - prefix_hashes[previous]) * _power(offset - previous) % HASH_MODULUS
+            offset += position - previous
+            value = (value + unchanged + hash(string) * _power(offset)) % HASH_MODULUS
+            offset += len(string)
+            previous = position + expand_symbols
+        unchanged = (prefix_hashes[-1] - prefix_hashes[previous]) * _power(offset - previous) % HASH_MODULUS
+        return (value + unchanged) % HASH_MODULUS
 
     def __len__(self):
         return len(self.symbols)
@@ -248,10 +354,17 @@ class String:
 
     def copy(self) -> "String":
         """Return a copy of the string."""
-        return String(self.symbols.copy())
+        string = String._from_symbols(self.symbols.copy())
+        string._hash = self._hash
+        string._prefix_hashes = self._prefix_hashes
+        return string
 
     def replace(self, index: int, symbol: Symbol):
         """Replace a symbol in the string with another symbol."""
+        if self._hash is not None:
+            change = hash(symbol.id) - hash(self.symbols[index].id)
+            self._hash = (self._hash + change * _power(index)) % HASH_MODULUS
+        self._prefix_hashes = None
         self.symbols[index] = symbol
         self._create_index()
 
@@ -264,5 +377,35 @@ class String:
             expand_symbols: The number of symbols to replace.
 
         """
+        if self._hash is not None:
+            self._hash = self._rewritten_hash([index], [string], expand_symbols)
+        self._prefix_hashes = None
         self.symbols[index:index+expand_symbols] = string.symbols
         self._create_index()
+
+    def rewrite(self, positions: list[int], strings: list["String"], expand_symbols: int = 1) -> "String":
+        """Return a new string with symbols at the given positions replaced with strings.
+
+        The new string is built in one left-to-right pass and indexed once,
+        the original string is not modified.
+
+        Args:
+            positions: Ascending positions of the first replaced symbols.
+            strings: Strings to insert, one for each position.
+            expand_symbols: The number of symbols to replace at each position.
+
+        Returns:
+            The rewritten string.
+
+        """
+        symbols = []
+        start = 0
+        for position, string in zip(positions, strings):
+            symbols.extend(self.symbols[start:position])
+            symbols.extend(string.symbols)
+            start = position + expand_symbols
+        symbols.extend(self.symbols[start:])
+        string = String._from_symbols(symbols)
+        if self._hash is not None and positions:
+            string._hash = self._rewritten_hash(positions, strings, expand_symbols)
+        return string
@@ -3,6 +3,7 @@
 """
 
 from enum import Enum
+from typing import Optional
 
 STRING_DELIMITER = " "
 """Delimiter used to join symbols in a string.
@@ -12,6 +13,12 @@ If you have only one character symbol you can set this to an empty string.
 """
 COLOR_CLI_OUTPUT = True
 """If set to True, the CLI output will be colored."""
+TRANSFORMATION_CACHE: Optional[str] = None
+"""Directory where results of transformations are cached, see :mod:`grammarlab.transformations.cache`.
+
+If None, results are not cached. Option is read on every call of transformation, so it can be set at any time.
+
+"""
 
 
 class Color(Enum):
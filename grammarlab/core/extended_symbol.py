@@ -1,8 +1,127 @@
-from typing import Dict, Tuple
+from array import array
+from typing import Dict, Iterable, Optional, Tuple
 
 from grammarlab.core.common import NonTerminal, Symbol, SymbolType, Terminal
 from grammarlab.core.config import Color
 
+try:
+    import numpy
+except ImportError:  # numpy is optional, arrays from module array are used without it
+    numpy = None
+
+
+class SymbolAttributes:
+    """Dense arrays of attributes of all symbols of one ExtendedSymbol class.
+
+    Every symbol gets code, its position in arrays. Variants and ids of base symbols are encoded
+    to integers too, so filters can compare attributes of encoded sential form as vectors.
+    Code 0 is reserved for symbols of other classes, all their attributes are -1.
+    Arrays are :mod:`numpy` arrays if numpy is installed, otherwise :class:`array.array`.
+
+    Example:
+        >>> class ESymbol(ExtendedSymbol):
+        ...     variants = {"checked": (SymbolType.NON_TERMINAL, "C")}
+        ...
+        >>> symbol = ESymbol(Symbol("S", SymbolType.TERMINAL))
+        >>> attributes = ESymbol.attributes
+        >>> codes = attributes.encode([symbol, symbol.checked])
+        >>> [attributes.variant[code] == attributes.variant_code("checked") for code in codes]
+        [False, True]
+        >>> [attributes.base[code] == attributes.base_code("S") for code in codes]
+        [True, True]
+        >>> attributes.first(codes, variant=attributes.variant_code("checked"))
+        1
+
+    """
+    def __init__(self):
+        self._variant = array("i", [-1])
+        self._base = array("i", [-1])
+        self._type = array("b", [-1])
+        self._variant_codes = {None: 0}
+        self._base_codes = {}
+        self._numpy = None
+        """Cached numpy copies of arrays, None if arrays changed."""
+
+    def __len__(self):
+        return len(self._variant)
+
+    def variant_code(self, variant) -> int:
+        """Code of variant name, variant None has code 0."""
+        return self._variant_codes.setdefault(variant, len(self._variant_codes))
+
+    def base_code(self, base_id) -> int:
+        """Code of id of base symbol."""
+        return self._base_codes.setdefault(base_id, len(self._base_codes))
+
+    def register(self, symbol: "ExtendedSymbol") -> int:
+        """Add symbol to arrays and return its code."""
+        self._variant.append(self.variant_code(symbol.variant))
+        self._base.append(self.base_code(symbol.base_symbol.id))
+        self._type.append(1 if symbol.type == SymbolType.NON_TERMINAL else 0)
+        self._numpy = None
+        return len(self._variant) - 1
+
+    def set_variant(self, code: int, variant):
+        """Update variant of symbol with given code."""
+        variant = self.variant_code(variant)
+        if self._variant[code] != variant:
+            self._variant[code] = variant
+            self._numpy = None
+
+    def _arrays(self):
+        if numpy is None:
+            return self._variant, self._base, self._type
+        if self._numpy is None:
+            self._numpy = (
+                numpy.array(self._variant, dtype=numpy.int32),
+                numpy.array(self._base, dtype=numpy.int32),
+                numpy.array(self._type, dtype=numpy.int8),
+            )
+        return self._numpy
+
+    @property
+    def variant(self):
+        """Code of variant of every symbol, indexed by code of symbol."""
+        return self._arrays()[0]
+
+    @property
+    def base(self):
+        """Code of id of base symbol of every symbol, indexed by code of symbol."""
+        return self._arrays()[1]
+
+    @property
+    def type(self):
+        """1 for non-terminals and 0 for terminals, indexed by code of symbol."""
+        return self._arrays()[2]
+
+    def encode(self, symbols: Iterable[Symbol]):
+        """Encode symbols to array of their codes, symbols of other classes are encoded to 0."""
+        codes = array("i", [getattr(symbol, "code", 0) for symbol in symbols])
+        if numpy is None:
+            return codes
+        return numpy.array(codes, dtype=numpy.int32)
+
+    def first(self, codes, variant: Optional[int] = None, base: Optional[int] = None) -> Optional[int]:
+        """Position of the first encoded symbol with given variant code and base code, None if there is none.
+
+        Attributes that are None are not compared. With numpy, attributes of all symbols are compared at once.
+
+        """
+        if numpy is not None:
+            mask = numpy.ones(len(codes), dtype=bool)
+            if variant is not None:
+                mask &= self.variant[codes] == variant
+            if base is not None:
+                mask &= self.base[codes] == base
+            positions = numpy.flatnonzero(mask)
+            return int(positions[0]) if len(positions) else None
+
+        variants, bases = self._variant, self._base
+        for position, code in enumerate(codes):
+            if (variant is None or variants[code] == variant) and (base is None or bases[code] == base):
+                return position
+        return None
+
 
 class ExtendedSymbol(Symbol):
     """ ExtendedSymbol is Symbol with additional flags
@@ -43,6 +162,9 @@ class ExtendedSymbol(Symbol):
     """
     _symbols = {}
 
+    attributes: SymbolAttributes = SymbolAttributes()
+    """Attribute arrays of symbols of this class, every subclass has its own."""
+
     variants: Dict[str, Tuple[SymbolType, str]] = {}
     """ Dictionary of all possible variants.
 
@@ -61,6 +183,10 @@ class ExtendedSymbol(Symbol):
 
     """
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.attributes = SymbolAttributes()
+
     def __new__(cls, base_symbol, symbol_id=None, symbol_type=None, variant=None):
         symbol_id = symbol_id or base_symbol.id
         symbol_type = symbol_type or base_symbol.type
@@ -77,6 +203,22 @@ class ExtendedSymbol(Symbol):
         self.type = symbol_type or base_symbol.type
 
         self.variant = variant
+        if "code" not in self.__dict__:
+            self.code = self.attributes.register(self)
+            """Position of symbol in attribute arrays of its class."""
+
+    @property
+    def variant(self):
+        """Name of variant, None for base symbol."""
+        return self._variant
+
+    @variant.setter
+    def variant(self, variant):
+        self._variant = variant
+        code = self.__dict__.get("code")
+        if code is not None:
+            # variant of cached symbol can be changed, attribute arrays follow it
+            self.attributes.set_variant(code, variant)
 
     def __getattr__(self, name: str):
         if name not in self.variants:
@@ -90,6 +232,9 @@ class ExtendedSymbol(Symbol):
             variant=name,
         )
 
+    def __reduce__(self):
+        return self.__class__, (self.base_symbol, self.id, self.type, self.variant)
+
     @property
     def base(self) -> "ExtendedSymbol":
         """Return base symbol.
@@ -0,0 +1,342 @@
+"""Pipeline of grammar filters and helpers for incremental filters.
+
+"""
+
+import inspect
+import logging
+import threading
+from collections import namedtuple
+from time import perf_counter
+from typing import Any, Callable, List, Optional
+
+log = logging.getLogger("grammarlab.Grammar")
+
+FilterStatistics = namedtuple("FilterStatistics", ["name", "calls", "rejections", "time"])
+"""Statistics of one filter. Time is total time in seconds spent in filter."""
+
+
+class _Stage:
+    """Filter together with its statistics."""
+    __slots__ = ("func", "calls", "rejections", "time")
+
+    def __init__(self, func):
+        self.func = func
+        self.calls = 0
+        self.rejections = 0
+        self.time = 0.0
+
+    @property
+    def rank(self) -> float:
+        """Expected time spent in filter per rejected configuration, cheap selective filters have low rank."""
+        if not self.calls:
+            return 0.0
+        # smoothed, so filters that never rejected anything are not ranked infinitely
+        rejection_rate = (self.rejections + 1) / (self.calls + 2)
+        return self.time / self.calls / rejection_rate
+
+
+class FilterPipeline:
+    """Filters evaluated in sequence until one of them rejects configuration.
+
+    Pipeline records number of calls, rejections and time spent in every filter.
+    If ``reorder_interval`` is set, filters are reordered every ``reorder_interval`` evaluations,
+    so filters that reject configurations with the lowest cost run first. Reordering is safe only
+    if filters don't depend on each other, otherwise it would change results, so it is disabled by default.
+    Grammars enable it by :meth:`Grammar.set_filter_reordering`.
+
+    Pipeline can be evaluated from several threads at once, e.g. by components of PC grammar system
+    derived concurrently. Evaluation order is never modified in place and statistics are updated under lock.
+
+    Examples:
+        >>> pipeline = FilterPipeline()
+        >>> pipeline.append(lambda number: number > 0)
+        >>> pipeline.append(lambda number: number % 2 == 0)
+        >>> [number for number in range(-2, 5) if pipeline(number)]
+        [2, 4]
+        >>> [(statistics.calls, statistics.rejections) for statistics in pipeline.statistics()]
+        [(7, 3), (4, 2)]
+
+    """
+    def __init__(self, reorder_interval: Optional[int] = None):
+        self.reorder_interval = reorder_interval
+        self._stages = []
+        """Stages in registration order."""
+        self._order = []
+        """Stages in evaluation order. List is replaced, never modified, so it can be iterated without lock."""
+        self._evaluations = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._stages)
+
+    def __iter__(self):
+        return iter([stage.func for stage in self._stages])
+
+    def append(self, func: Callable[..., bool]):
+        """Add filter to the end of pipeline."""
+        stage = _Stage(func)
+        with self._lock:
+            self._stages = self._stages + [stage]
+            self._order = self._order + [stage]
+
+    def __call__(self, *args) -> bool:
+        """Evaluate filters, return False if any of them rejects arguments."""
+        accepted = True
+        times = []
+        for stage in self._order:
+            start = perf_counter()
+            result = stage.func(*args)
+            times.append((stage, perf_counter() - start))
+            if not result:
+                accepted = False
+                break
+
+        with self._lock:
+            for stage, time in times:
+                stage.time += time
+                stage.calls += 1
+            if not accepted:
+                times[-1][0].rejections += 1
+            self._evaluations += 1
+            reorder = self.reorder_interval and self._evaluations % self.reorder_interval == 0
+        if reorder:
+            self.reorder()
+        return accepted
+
+    def reorder(self):
+        """Order filters by expected cost of rejection."""
+        with self._lock:
+            self._order = sorted(self._order, key=lambda stage: stage.rank)
+
+    def statistics(self) -> List[FilterStatistics]:
+        """Return statistics of filters in registration order."""
+        return [
+            FilterStatistics(getattr(stage.func, "__name__", repr(stage.func)), stage.calls, stage.rejections, stage.time)
+            for stage in self._stages
+        ]
+
+    def reset_statistics(self):
+        """Reset statistics of all filters, evaluation order is kept."""
+        with self._lock:
+            for stage in self._stages:
+                stage.calls = 0
+                stage.rejections = 0
+                stage.time = 0.0
+            self._evaluations = 0
+
+
+def filter_key(func: Callable) -> Optional[str]:
+    """Description of filter that is the same in every process, None if filter has no such description.
+
+    Functions are described by their qualified names. Lambdas and local functions are not described,
+    different functions can share their names. Other filters describe themselves by ``canonical_form``
+    method, so filters with different parameters, e.g. filters wrapping different filters, are told apart.
+
+    """
+    canonical_form = getattr(func, "canonical_form", None)
+    if canonical_form is not None:
+        return canonical_form()
+    if inspect.isfunction(func) and "<" not in func.__qualname__:
+        return f"{func.__module__}.{func.__qualname__}"
+    return None
+
+
+def first_position(predicate: Callable[[Any], bool], symbols: List, start: int = 0, end: Optional[int] = None):
+    """Position of the first symbol in ``symbols[start:end]`` that satisfies predicate, None if there is none."""
+    end = len(symbols) if end is None else end
+    for position in range(start, end):
+        if predicate(symbols[position]):
+            return position
+    return None
+
+
+def last_position(predicate: Callable[[Any], bool], symbols: List, start: int = 0, end: Optional[int] = None):
+    """Position of the last symbol in ``symbols[start:end]`` that satisfies predicate, None if there is none."""
+    end = len(symbols) if end is None else end
+    for position in range(end - 1, start - 1, -1):
+        if predicate(symbols[position]):
+            return position
+    return None
+
+
+def shift_position(position: int, regions: List) -> Optional[int]:
+    """Position of symbol of parent sential form in derived sential form, None if symbol was rewritten.
+
+    Args:
+        position: Position in parent sential form.
+        regions: Rewritten regions as returned by :meth:`Configuration.rewritten_regions`.
+
+    """
+    offset = 0
+    for region in regions:
+        if position < region.start:
+            break
+        if position < region.end:
+            return None
+        offset += (region.new_end - region.new_start) - (region.end - region.start)
+    return position + offset
+
+
+def update_first(position: Optional[int], predicate, symbols: List, regions: List, start: int = 0) -> Optional[int]:
+    """Update position of the first symbol that satisfies predicate after rewriting.
+
+    Only rewritten regions are scanned. If tracked symbol was rewritten, symbols are scanned
+    from the region that rewrote it.
+
+    Args:
+        position: Position of the first matching symbol not before start in parent sential form or None.
+        predicate: Predicate on symbols.
+        symbols: Symbols of derived sential form.
+        regions: Rewritten regions, no region may contain start.
+        start: Position in derived sential form from which symbols are considered.
+
+    Returns:
+        Position of the first matching symbol not before start in derived sential form or None.
+
+    """
+    shifted = None if position is None else shift_position(position, regions)
+    for region in regions:
+        if region.new_end <= start:
+            continue
+        if shifted is not None and region.new_start > shifted:
+            break
+        if shifted is None and position is not None and region.start <= position < region.end:
+            # symbols between tracked position and region are not matching
+            return first_position(predicate, symbols, max(start, region.new_start))
+        found = first_position(predicate, symbols, max(start, region.new_start), region.new_end)
+        if found is not None:
+            return found
+    return shifted
+
+
+def update_last(position: Optional[int], predicate, symbols: List, regions: List) -> Optional[int]:
+    """Update position of the last symbol that satisfies predicate after rewriting.
+
+    Counterpart of :func:`update_first`, symbols are scanned from the end.
+
+    """
+    shifted = None if position is None else shift_position(position, regions)
+    for region in reversed(regions):
+        if shifted is not None and region.new_end <= shifted:
+            break
+        if shifted is None and position is not None and region.start <= position < region.end:
+            return last_position(predicate, symbols, end=region.new_end)
+        found = last_position(predicate, symbols, region.new_start, region.new_end)
+        if found is not None:
+            return found
+    return shifted
+
+
+def count_change(predicate, parent_symbols: List, symbols: List, regions: List) -> int:
+    """Change of number of symbols that satisfy predicate caused by rewriting."""
+    change = 0
+    for start, end, new_start, new_end in regions:
+        for position in range(start, end):
+            if predicate(parent_symbols[position]):
+                change -= 1
+        for position in range(new_start, new_end):
+            if predicate(symbols[position]):
+                change += 1
+    return change
+
+
+class IncrementalFilter:
+    """Filter that derives its state from state of parent configuration.
+
+    State of filter is stored in configuration. When configuration is filtered and its parent
+    already has state, only regions rewritten by used rule are inspected by :meth:`update`.
+    Otherwise whole sential form is scanned by :meth:`initialize`.
+
+    Subclasses implement :meth:`initialize`, :meth:`update` and :meth:`accept`.
+    Filters that restrict only some sential forms implement :meth:`applies`, state is not computed
+    for sential forms that are accepted anyway. Sential forms shorter than ``min_length`` are always
+    scanned whole, for them it is cheaper than inspecting rewritten regions.
+
+    Args:
+        name: Name of filter used in logs and statistics.
+        component: Index of component of PC grammar system configuration that is filtered.
+            If None, configuration itself is filtered.
+
+    """
+    min_length = 100
+    """Sential forms shorter than this are not updated incrementally."""
+
+    def __init__(self, name: Optional[str] = None, component: Optional[int] = None):
+        self.__name__ = name or self.__class__.__name__
+        self.component = component
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.__name__})"
+
+    def canonical_form(self) -> str:
+        """Description of filter used by :func:`filter_key`, subclasses with other parameters extend it."""
+        cls = self.__class__
+        return f"{cls.__module__}.{cls.__qualname__}({self.__name__!r}, component={self.component!r})"
+
+    def initialize(self, sential_form) -> Any:
+        """Compute state of sential form from scratch."""
+        raise NotImplementedError
+
+    def update(self, state: Any, parent_form, sential_form, regions: List) -> Any:
+        """Compute state of sential form from state of parent sential form.
+
+        Args:
+            state: State of parent sential form.
+            parent_form: Parent sential form.
+            sential_form: Derived sential form.
+            regions: Regions of parent sential form rewritten by used rule.
+
+        Returns:
+            New state, or None if state has to be computed by :meth:`initialize`.
+
+        """
+        return None
+
+    def applies(self, sential_form) -> bool:
+        """Check if filter restricts sential form, sential forms for which it doesn't are accepted."""
+        return True
+
+    def accept(self, state: Any) -> bool:
+        """Decide if sential form with given state passes filter."""
+        raise NotImplementedError
+
+    def state(self, configuration) -> Any:
+        """Return state of configuration, it is computed and stored if it is missing."""
+        states = configuration.filter_state
+        if states is None:
+            states = configuration.filter_state = {}
+        elif self in states:
+            return states[self]
+
+        state = None
+        parent = configuration.parent
+        if (
+            parent is not None and parent.filter_state and self in parent.filter_state
+            and len(configuration.sential_form) >= self.min_length
+        ):
+            regions = configuration.rewritten_regions()
+            if regions is not None:
+                state = self.update(parent.filter_state[self], parent.sential_form, configuration.sential_form, regions)
+        if state is None:
+            state = self.initialize(configuration.sential_form)
+        states[self] = state
+        return state
+
+    def __call__(self, configuration) -> bool:
+        if self.component is not None:
+            configuration = configuration[self.component]
+        if not self.applies(configuration.sential_form):
+            return True
+        result = self.accept(self.state(configuration))
+        if not result:
+            log.debug("%s filtered %s", self.__name__, configuration)
+        return result
@@ -2,14 +2,19 @@
 
 """
 
+import hashlib
 import logging
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from collections import namedtuple
+from dataclasses import dataclass, field
 from enum import Enum
-from functools import wraps
-from typing import Any, Callable, Generator, List, Optional
+from functools import partial, wraps
+from typing import Any, Callable, Dict, FrozenSet, Generator, Hashable, Iterable, List, Optional, Tuple
 
-from grammarlab.core.common import String
+from grammarlab.core.analysis import minimum_length
+from grammarlab.core.cache import LRUCache, SuccessorCache
+from grammarlab.core.common import String, Symbol
+from grammarlab.core.filter import FilterPipeline, FilterStatistics, filter_key
 
 log = logging.getLogger("grammarlab.Grammar")
 
@@ -22,6 +27,10 @@ class DerivationSequence(list):
     """
 
 
+Region = namedtuple("Region", ["start", "end", "new_start", "new_end"])
+"""Region ``[start, end)`` of parent sential form rewritten to region ``[new_start, new_end)`` of derived one."""
+
+
 class DerivationStrategy(Enum):
     """Derivation strategy
 
@@ -69,10 +78,25 @@ class Configuration:
     """Identifier of affected parts of sential form."""
     depth: int = 0
     """Distance from axiom."""
+    filter_state: dict = field(default=None, repr=False, compare=False)
+    """States of incremental filters, see :class:`grammarlab.core.filter.IncrementalFilter`."""
 
     def __eq__(self, other):
         return isinstance(other, Configuration) and self.data == other.data
 
+    def __hash__(self):
+        return hash(self.data)
+
+    @property
+    def key(self) -> Any:
+        """Hashable value equal for configurations with equal data.
+
+        Unlike configuration itself, key doesn't reference parent configurations,
+        so it can be stored without keeping derivation sequence alive.
+
+        """
+        return self.data
+
     @property
     @abstractmethod
     def sential_form(self) -> String:
@@ -84,6 +108,17 @@ class Configuration:
             String
         """
 
+    def rewritten_regions(self) -> Optional[List[Region]]:
+        """Regions of parent sential form rewritten by used rule.
+
+        Returns:
+            Ascending list of regions or None if configuration wasn't derived by rule from its parent.
+
+        """
+        if self.parent is None or not isinstance(self.used_rule, Rule):
+            return None
+        return self.used_rule.rewritten_regions(self.affected)
+
     def derivation_sequence(self) -> DerivationSequence:
         """Return sequence of configuration.
 
@@ -106,8 +141,80 @@ class Rule:
 
     """
 
-    def apply(self, configuration: Configuration) -> List[Configuration]:
-        """Apply production on configuration."""
+    def apply(self, configuration: Configuration, pre_filter: Optional["PreFilter"] = None) -> List[Configuration]:
+        """Apply production on configuration.
+
+        If pre_filter is given, it is called with configuration, rule and match before new configuration
+        is created. Matches for which pre_filter returns False are skipped.
+
+        """
+        raise NotImplementedError
+
+    def rewritten_regions(self, affected: Any) -> Optional[List[Region]]:
+        """Regions of sential form rewritten by rule applied at affected part, None if they are not known."""
+        return None
+
+    def productions(self) -> Optional[List[Tuple[Symbol, String]]]:
+        """Context-free productions that can perform every application of rule, None if there are none."""
+        return None
+
+    @property
+    def key(self) -> Hashable:
+        """Canonical form of rule, rules with equal keys derive the same configurations.
+
+        Rule without canonical form is equal only to itself.
+
+        """
+        return self.__class__, id(self)
+
+
+class RuleSet:
+    """Ordered set of rules without duplicates.
+
+    Rules are compared by :attr:`Rule.key`, so rules created separately with the same sides
+    are stored only once. The first added rule is kept and rules keep order in which they were added.
+
+    Example:
+        >>> from grammarlab.core.common import NonTerminal, String, Terminal
+        >>> from grammarlab.grammars import ContextFreeRule
+        >>> rules = RuleSet()
+        >>> rules.add(ContextFreeRule(String([NonTerminal("S")]), String([Terminal("a")])))
+        True
+        >>> rules.add(ContextFreeRule(String([NonTerminal("S")]), String([Terminal("a")])))
+        False
+        >>> len(rules)
+        1
+
+    """
+    def __init__(self, rules: Iterable[Rule] = ()):
+        self._rules = {}
+        self.extend(rules)
+
+    def add(self, rule: Rule) -> bool:
+        """Add rule, return False if the same rule is already in set."""
+        key = rule.key
+        if key in self._rules:
+            return False
+        self._rules[key] = rule
+        return True
+
+    def extend(self, rules: Iterable[Rule]):
+        """Add all rules."""
+        for rule in rules:
+            self.add(rule)
+
+    def __contains__(self, rule: Rule) -> bool:
+        return rule.key in self._rules
+
+    def __iter__(self):
+        return iter(self._rules.values())
+
+    def __len__(self):
+        return len(self._rules)
+
+
+PreFilter = Callable[[Configuration, Rule, Any], bool]
+"""Filter of rule application. It receives configuration, rule and match before rule is applied."""
 
 
 class Grammar(ABC):
@@ -118,12 +225,100 @@ class Grammar(ABC):
 
     """
 
+    _fingerprint: Optional[str] = None
+    """Cached fingerprint, None if it has to be computed."""
+
     def __init__(self):
-        self.filters = []
+        self.filters = FilterPipeline()
+        """Filters of derived configurations."""
+        self.pre_filters = FilterPipeline()
+        """Filters of rule applications."""
+
+    def __getstate__(self):
+        """State of pickled grammar. Function set by :func:`grammarlab.export.derivation_code.compile_grammar`
+        is not pickled, unpickled grammar has to be compiled again."""
+        state = self.__dict__.copy()
+        state.pop("direct_derive", None)
+        return state
 
     def set_filter(self, func: Callable[[Configuration], bool]):
         log.info("Setting filter: %s.", func.__name__)
         self.filters.append(func)
+        self._fingerprint = None
+
+    def set_pre_filter(self, func: PreFilter):
+        """Set filter that is evaluated before rule is applied.
+
+        Pre-filter receives configuration, rule and match. If it returns False, rule is not applied
+        at the match, so derived sential form is never built. Pre-filter should depend only on
+        sential form and affected part of configuration, successors of PC grammar system components
+        are cached by them.
+
+        """
+        log.info("Setting pre-filter: %s.", func.__name__)
+        self.pre_filters.append(func)
+        self._fingerprint = None
+
+    def set_filter_reordering(self, interval: Optional[int]):
+        """Reorder filters and pre-filters every ``interval`` evaluations by their statistics.
+
+        Filters that reject configurations with the lowest cost are evaluated first, see :class:`FilterPipeline`.
+        Reordering is safe only if filters don't depend on each other. If interval is None,
+        filters keep their current order.
+
+        """
+        log.info("Setting filter reordering interval: %s.", interval)
+        self.filters.reorder_interval = interval
+        self.pre_filters.reorder_interval = interval
+
+    def _all_filters(self) -> List[Callable]:
+        return [func for pipeline in (self.filters, self.pre_filters) for func in pipeline]
+
+    def filter_keys(self) -> List[str]:
+        """Descriptions of filters and pre-filters given by :func:`filter_key`, sorted so they don't depend
+        on registration order. Filters without description are described by their identity."""
+        keys = []
+        for func in self._all_filters():
+            key = filter_key(func)
+            keys.append(key if key is not None else f"<{getattr(func, '__name__', 'filter')} at {id(func):#x}>")
+        return sorted(keys)
+
+    @property
+    def fingerprint_is_stable(self) -> bool:
+        """Check if :attr:`fingerprint` is the same in every process.
+
+        It isn't if some filter has no description (see :func:`filter_key`), such filter
+        is described by its identity, so grammars with different filters never share fingerprint.
+
+        """
+        return all(filter_key(func) is not None for func in self._all_filters())
+
+    def canonical_form(self) -> Tuple:
+        """Description of grammar used by :attr:`fingerprint`.
+
+        Canonical form contains only strings and numbers, equal grammars have equal canonical forms
+        in every process, unless :attr:`fingerprint_is_stable` is False. It doesn't depend on order of rules,
+        order of symbols in alphabets or labels of rules.
+
+        Raises:
+            NotImplementedError: Grammar has no canonical form.
+
+        """
+        raise NotImplementedError(f"{self.__class__.__name__} has no canonical form!")
+
+    @property
+    def fingerprint(self) -> str:
+        """SHA-256 hash of :meth:`canonical_form`.
+
+        Fingerprint is stable across processes if :attr:`fingerprint_is_stable`, so it can be used as key
+        of persistent caches. Filters are part of it, they are described by :func:`filter_key`.
+        It is computed once and computed again only after grammar is changed by setters
+        of its alphabets and rules, :meth:`add_rule`, :meth:`set_filter` or :meth:`set_pre_filter`.
+
+        """
+        if self._fingerprint is None:
+            self._fingerprint = hashlib.sha256(repr(self.canonical_form()).encode()).hexdigest()
+        return self._fingerprint
 
     @property
     @abstractmethod
@@ -163,21 +358,115 @@ class Grammar(ABC):
         """
 
     def _filter(self, configuration: Configuration):
-        for func in self.filters:
-            if not func(configuration):
-                return False
+        return self.filters(configuration)
+
+    def _pre_filter(self, configuration: Configuration, rule: Rule, match: Any):
+        return self.pre_filters(configuration, rule, match)
+
+    @property
+    def pre_filter(self) -> Optional[PreFilter]:
+        """Pre-filter passed to rules, None if grammar has no pre-filters."""
+        return self.pre_filters if self.pre_filters else None
+
+    def filter_statistics(self) -> List[FilterStatistics]:
+        """Statistics of filters and pre-filters in registration order.
+
+        Statistics show how many configurations every filter rejected and how much time it took.
+
+        """
+        return self.filters.statistics() + self.pre_filters.statistics()
+
+    def expansion_key(self, configuration: Configuration) -> Any:
+        """Key of configuration that determines its successors.
+
+        Pre-filters may reject rule applications based on affected part of configuration,
+        so it is part of the key if grammar has pre-filters.
+
+        """
+        if not self.pre_filters:
+            return configuration.key
+        affected = configuration.affected
+        return configuration.key, tuple(affected) if isinstance(affected, list) else affected
+
+    def _first_expansion(self, transpositions: LRUCache, configuration: Configuration, depth: int) -> bool:
+        """Record expansion of configuration at depth in transposition table.
+
+        Returns:
+            False if the same configuration was already expanded at the same or lower depth.
+
+        """
+        key = self.expansion_key(configuration)
+        expanded_depth = transpositions.get(key)
+        if expanded_depth is not None and expanded_depth <= depth:
+            return False
+        transpositions.put(key, depth)
         return True
 
-    def _dfs_derive(self, axiom: Configuration, depth: int):
-        """Depth-First search derivation."""
+    def minimum_yields(self) -> Optional[Dict[Symbol, float]]:
+        """Minimal length of sentence derivable from every symbol, None if grammar provides no bound.
+
+        Symbols missing in returned dictionary yield at least one symbol.
+
+        """
+        return None
+
+    def dead_symbols(self, generating: Iterable[Symbol] = ()) -> FrozenSet[Symbol]:
+        """Non-terminals from which no sentence can be derived.
+
+        Sential forms that contain dead symbol are pruned by :meth:`derive`.
+
+        Args:
+            generating: Symbols assumed to derive sentence.
+
+        """
+        return frozenset()
+
+    @staticmethod
+    def _contains_dead_symbol(dead: FrozenSet[Symbol], configuration: Configuration) -> bool:
+        """Check if sential form of configuration contains any of dead symbols."""
+        index = configuration.sential_form.index
+        # index is defaultdict, lookups may have inserted symbols without positions
+        return any(index[symbol] for symbol in dead.intersection(index))
+
+    def _exceeds_length(self, yields: Optional[Dict[Symbol, float]], max_length: int, configuration: Configuration) -> bool:
+        """Check if every sentence derivable from configuration is longer than max_length."""
+        sential_form = configuration.sential_form
+        if yields is None:
+            return sential_form.is_sentence and len(sential_form) > max_length
+        return minimum_length(sential_form.symbols, yields) > max_length
+
+    def _successors(self, configuration: Configuration, memo: Optional[SuccessorCache] = None):
+        """Iterator over configurations derived from configuration, memo is used if it is given."""
+        if memo is None:
+            return self.direct_derive(configuration)
+        return iter(memo.successors(self.expansion_key(configuration), configuration, self.direct_derive))
+
+    def _dfs_derive(
+        self,
+        axiom: Configuration,
+        depth: int,
+        transpositions: Optional[LRUCache] = None,
+        memo: Optional[SuccessorCache] = None,
+        prune: Optional[Callable[[Configuration], bool]] = None,
+    ):
+        """Depth-First search derivation.
+
+        If transposition table is given, configuration is not expanded if the same configuration
+        was already expanded at the same or lower depth. Configuration itself is still yielded.
+        If memo is given, successors are taken from it. Configurations for which prune returns True
+        are neither yielded nor expanded.
+
+        """
         log.info("DFS search. (depth=%s)", depth)
-        stack = [self.direct_derive(axiom)]
+        stack = [self._successors(axiom, memo)]
         while stack:
             next_configuration = next(stack[-1], None)
             if next_configuration is None:
                 stack.pop()
                 continue
 
+            if prune is not None and prune(next_configuration):
+                continue
             if not self._filter(next_configuration):
                 continue
 
@@ -187,17 +476,27 @@ class Grammar(ABC):
                 continue
 
             if len(stack) < depth:
-                stack.append(self.direct_derive(next_configuration))
+                if transpositions is not None and not self._first_expansion(transpositions, next_configuration, len(stack)):
+                    continue
+                stack.append(self._successors(next_configuration, memo))
 
-    def _bfs_derive(self, axiom: Configuration, depth: int):
+    def _bfs_derive(
+        self,
+        axiom: Configuration,
+        depth: int,
+        memo: Optional[SuccessorCache] = None,
+        prune: Optional[Callable[[Configuration], bool]] = None,
+    ):
         """Breadth-First search derivation."""
         log.info("BFS search. (depth=%s)", depth)
-        queue = [self.direct_derive(axiom)]
+        queue = [self._successors(axiom, memo)]
         while queue:
             configuration = queue.pop(0)
             for next_configuration in list(configuration):
                 if next_configuration.depth > depth:
                     break
+                if prune is not None and prune(next_configuration):
+                    continue
                 if not self._filter(next_configuration):
                     continue
 
@@ -205,13 +504,27 @@ class Grammar(ABC):
 
                 if next_configuration.sential_form.is_sentence:
                     continue
-                queue.append(self.direct_derive(next_configuration))
+                queue.append(self._successors(next_configuration, memo))
 
-    def _ids_derive(self, axiom: Configuration, depth: int = None):
-        """Iterative deepening search derivation."""
+    def _ids_derive(
+        self,
+        axiom: Configuration,
+        depth: int = None,
+        transpositions: Optional[LRUCache] = None,
+        memo: Optional[SuccessorCache] = None,
+        prune: Optional[Callable[[Configuration], bool]] = None,
+    ):
+        """Iterative deepening search derivation.
+
+        Transposition table is cleared before every iteration.
+        Memo is kept, so successors of shallow configurations are derived only in the first iterations.
+
+        """
         current_depth = 0
         while depth is None or current_depth < depth:
-            for configuration in self._dfs_derive(axiom, current_depth):
+            if transpositions is not None:
+                transpositions.clear()
+            for configuration in self._dfs_derive(axiom, current_depth, transpositions, memo, prune):
                 if configuration.depth == current_depth:
                     yield configuration
             current_depth += 1
@@ -223,6 +536,10 @@ class Grammar(ABC):
         only_sentences: bool = True,
         strategy: DerivationStrategy = DerivationStrategy.DFS,
         axiom: Configuration = None,
+        transposition_table: Optional[int] = None,
+        successor_memo: Optional[int] = None,
+        max_length: Optional[int] = None,
+        prune_dead_symbols: bool = True,
     ) -> Generator[Configuration, None, None]:
         """Derive from axiom
 
@@ -232,6 +549,18 @@ class Grammar(ABC):
             only_sentences: Yield only sentences.
             strategy: One of DFS, BFS, IDS.
             start: Starting configuration. If start=None, axiom is used.
+            transposition_table: Number of configurations remembered by DFS and IDS with depth
+                of their shallowest expansion. Configurations already expanded at the same or lower depth
+                are yielded but not expanded again. Least recently used entries are evicted.
+                If None, every configuration is expanded.
+            successor_memo: Number of configurations whose successors are memoised. Memoised successors
+                are not derived again, they are replayed with new parent. Least recently used entries are evicted.
+                Limit counts entries, not memory, every entry holds all successors of its configuration.
+                Entries are keyed by :meth:`expansion_key`. If None, successors are not memoised.
+            max_length: Maximal length of derived sentences. Configurations from which only longer
+                sentences can be derived are pruned, bound is given by :meth:`minimum_yields`.
+            prune_dead_symbols: Prune sential forms that contain symbol given by :meth:`dead_symbols`.
+                Dead symbols are computed once per derivation.
 
         Returns:
 
@@ -252,30 +581,61 @@ class Grammar(ABC):
             DerivationStrategy.IDS: self._ids_derive,
         }
 
-        for configuration in algorithms[strategy](axiom=axiom or self.axiom, depth=depth):
+        search = algorithms[strategy]
+        if transposition_table and strategy != DerivationStrategy.BFS:
+            search = partial(search, transpositions=LRUCache(transposition_table))
+        if successor_memo:
+            search = partial(search, memo=SuccessorCache(successor_memo))
+        prunes = []
+        if max_length is not None:
+            prunes.append(partial(self._exceeds_length, self.minimum_yields(), max_length))
+        if prune_dead_symbols:
+            dead = self.dead_symbols()
+            if dead:
+                log.info("Dead symbols: %s", dead)
+                prunes.append(partial(self._contains_dead_symbol, dead))
+        if len(prunes) == 1:
+            search = partial(search, prune=prunes[0])
+        elif prunes:
+            search = partial(search, prune=lambda configuration: any(prune(configuration) for prune in prunes))
+
+        for configuration in search(axiom=axiom or self.axiom, depth=depth):
             if exact_depth and depth and configuration.depth != depth:
                 continue
             if only_sentences and not configuration.sential_form.is_sentence:
                 continue
             yield configuration
 
-    def parse(self, configuration: Configuration, matches: int = 1) -> Generator[Configuration, None, None]:
+    def parse(
+        self,
+        configuration: Configuration,
+        matches: int = 1,
+        successor_memo: Optional[int] = 10000,
+    ) -> Generator[Configuration, None, None]:
         """Return configuration with given sential form derived from axiom.
 
         IDS is used to find configuration with given sential form.
         So this method can take considerable amount of time. This method can be overriden in subclass
-        to provide more efficient implementation.
+        to provide more efficient implementation. Successors of configurations are memoised,
+        so shallow levels of search tree are not derived again in every iteration.
+        Configurations whose minimal yield exceeds minimal yield of given sential form are pruned.
         If grammar doesn't generate configuration with given sential form, method runs indefinitely.
 
         Args:
             configuration: Configuration with sential form to be parsed.
             matches: Number of matches to be returned.
+            successor_memo: Number of configurations whose successors are memoised, see :meth:`derive`.
+                Limit counts entries, not memory. If None, successors are not memoised.
 
         Returns:
             Generator of configurations with given sential form.
 
         """
-        for derived_configuration in self.derive(strategy=DerivationStrategy.IDS):
+        yields = self.minimum_yields()
+        sential_form = configuration.sential_form
+        max_length = len(sential_form) if yields is None else minimum_length(sential_form.symbols, yields)
+        derivation = self.derive(strategy=DerivationStrategy.IDS, successor_memo=successor_memo, max_length=max_length)
+        for derived_configuration in derivation:
             if derived_configuration.sential_form == configuration.sential_form:
                 yield derived_configuration
                 matches -= 1
@@ -312,6 +672,7 @@ def grammar_filter(func: Optional[callable] = None, *, show_filtered: bool = Fal
 
     Function will be evaluated for each configuration.
     If function returns False, configuration will be filtered out.
+    Pre-filters can be decorated too, all arguments are passed to function.
 
     Args:
         func: Filter function. Defaults to None.
@@ -331,10 +692,10 @@ def grammar_filter(func: Optional[callable] = None, *, show_filtered: bool = Fal
 
     def decorator(func):
         @wraps(func)
-        def wrapper(sential_form):
-            result = func(sential_form)
+        def wrapper(configuration, *args):
+            result = func(configuration, *args)
             if not result:
-                LOG("%s filtered %s", func.__name__, sential_form)
+                LOG("%s filtered %s", func.__name__, configuration)
             return result
         return wrapper
     return decorator(func) if func else decorator
@@ -19,5 +19,6 @@ Every formatter contains example of it's output it docstring.
 
 from grammarlab.export.cli import CliExport
 from grammarlab.export.code import CodeExport
+from grammarlab.export.derivation_code import DerivationCodeExport
 from grammarlab.export.graph import GraphExport
 from grammarlab.export.latex import LatexExport
@@ -0,0 +1,301 @@
+"""Export of grammars to python code specialised for derivation.
+
+:class:`DerivationCodeExport` exports grammar to python source of ``direct_derive`` function.
+Every rule is exported to straight-line function with inlined symbols, so derivation doesn't
+execute generic matching loops. :func:`compile_grammar` executes exported source and replaces
+``direct_derive`` of the grammar with the compiled one.
+
+Example:
+    >>> from grammarlab.grammars import CF
+    >>> from grammarlab.export.derivation_code import compile_grammar
+    >>> grammar = compile_grammar(CF({"S"}, {"a"}, [("S", "a"), ("S", "aS")], "S"))
+    >>> [str(configuration.sential_form) for configuration in grammar.derive(3)]
+    ['a', 'a a', 'a a a']
+
+"""
+
+import linecache
+from bisect import bisect_right
+from itertools import count
+
+from grammarlab.core.common import String, SymbolType
+from grammarlab.export.export import Export, formatter
+from grammarlab.grammars.pc_grammar_system import PCGrammarSystem
+from grammarlab.grammars.phrase_grammar import (
+    ContextFreeRule,
+    PhraseConfiguration,
+    PhraseGrammar,
+    PhraseRule,
+)
+from grammarlab.grammars.scattered_context_grammar import (
+    ScatteredContextRule,
+    SCGConfiguration,
+)
+
+RULE_ARGUMENTS = "configuration, sential_form, symbols, length, leftmost, depth, pre_filter"
+"""Arguments of every exported rule function. They are computed once per derivation step."""
+
+
+def _leftmost(symbols):
+    """Position of the leftmost non-terminal or None if there is no non-terminal."""
+    for position, symbol in enumerate(symbols):
+        if symbol.type == SymbolType.NON_TERMINAL:
+            return position
+    return None
+
+
+class CompiledCode:
+    """Source code together with namespace of objects referenced by the code."""
+    def __init__(self, content, namespace):
+        self.content = content
+        self.namespace = namespace
+
+    def __str__(self):
+        return self.content
+
+
+class DerivationCodeExport(Export):
+    """Export grammar to python code of specialised ``direct_derive`` function.
+
+    Objects that can't be written as literals (symbols, rules, configuration classes)
+    are stored in namespace and referenced by generated names.
+
+    """
+    @staticmethod
+    def _constant(namespace, value):
+        name = f"c_{len(namespace)}"
+        namespace[name] = value
+        return name
+
+    def _rewrite(self, namespace, position, lhs_length, rhs, indent):
+        """Lines that create list ``derived`` with ``lhs_length`` symbols from ``position`` replaced by rhs."""
+        if len(rhs) == lhs_length:
+            lines = ["derived = symbols.copy()"]
+            for offset, symbol in enumerate(rhs):
+                lines.append(f"derived[{position} + {offset}] = {self._constant(namespace, symbol)}")
+        elif len(rhs) == 0:
+            lines = [f"derived = symbols[:{position}] + symbols[{position} + {lhs_length}:]"]
+        else:
+            rhs = self._constant(namespace, list(rhs))
+            lines = [f"derived = symbols[:{position}] + {rhs} + symbols[{position} + {lhs_length}:]"]
+        return [indent + line for line in lines]
+
+    @formatter(PhraseRule)
+    def PhraseRule(self, rule, name, namespace):
+        """
+        .. code-block:: python
+
+            def rule_0(configuration, sential_form, symbols, length, leftmost, depth, pre_filter):
+                for position in sential_form.index.get(c_3, ()):
+                    if position + 2 > length:
+                        continue
+                    if symbols[position + 1] != c_4:
+                        continue
+                    if pre_filter is not None and not pre_filter(configuration, c_5, position):
+                        continue
+                    derived = symbols[:position] + c_6 + symbols[position + 2:]
+                    yield c_7(String._from_symbols(derived), configuration, c_5, position, depth)
+
+        """
+        lhs_length = len(rule.lhs)
+        lines = [
+            f"def {name}({RULE_ARGUMENTS}):",
+            f"    for position in sential_form.index.get({self._constant(namespace, rule.lhs[0])}, ()):",
+        ]
+        if lhs_length > 1:
+            lines.extend([
+                f"        if position + {lhs_length} > length:",
+                "            continue",
+            ])
+        for offset, symbol in enumerate(rule.lhs[1:], start=1):
+            lines.extend([
+                f"        if symbols[position + {offset}] != {self._constant(namespace, symbol)}:",
+                "            continue",
+            ])
+        used_rule = self._constant(namespace, rule)
+        lines.extend([
+            f"        if pre_filter is not None and not pre_filter(configuration, {used_rule}, position):",
+            "            continue",
+        ])
+        lines.extend(self._rewrite(namespace, "position", lhs_length, rule.rhs, indent=" " * 8))
+        configuration_class = self._constant(namespace, PhraseConfiguration)
+        lines.append(
+            f"        yield {configuration_class}(String._from_symbols(derived), configuration, {used_rule}, position, depth)"
+        )
+        return "\n".join(lines) + "\n"
+
+    @formatter(ContextFreeRule)
+    def ContextFreeRule(self, rule, name, namespace):
+        """
+        .. code-block:: python
+
+            def rule_0(configuration, sential_form, symbols, length, leftmost, depth, pre_filter):
+                if leftmost is not None and symbols[leftmost] == c_3:
+                    if pre_filter is not None and not pre_filter(configuration, c_4, leftmost):
+                        return
+                    derived = symbols[:leftmost] + c_5 + symbols[leftmost + 1:]
+                    yield c_6(String._from_symbols(derived), configuration, c_4, leftmost, depth)
+
+        """
+        lines = [
+            f"def {name}({RULE_ARGUMENTS}):",
+            f"    if leftmost is not None and symbols[leftmost] == {self._constant(namespace, rule.lhs[0])}:",
+        ]
+        used_rule = self._constant(namespace, rule)
+        lines.extend([
+            f"        if pre_filter is not None and not pre_filter(configuration, {used_rule}, leftmost):",
+            "            return",
+        ])
+        lines.extend(self._rewrite(namespace, "leftmost", 1, rule.rhs, indent=" " * 8))
+        configuration_class = self._constant(namespace, PhraseConfiguration)
+        lines.append(
+            f"        yield {configuration_class}(String._from_symbols(derived), configuration, {used_rule}, leftmost, depth)"
+        )
+        return "\n".join(lines) + "\n"
+
+    @formatter(ScatteredContextRule)
+    def ScatteredContextRule(self, rule, name, namespace):
+        """
+        .. code-block:: python
+
+            def rule_0(configuration, sential_form, symbols, length, leftmost, depth, pre_filter):
+                index = sential_form.index
+                positions_0 = index.get(c_3)
+                if not positions_0:
+                    return
+                positions_1 = index.get(c_4)
+                if not positions_1:
+                    return
+                for position_0 in positions_0:
+                    for position_1 in positions_1[bisect_right(positions_1, position_0):]:
+                        match = [position_0, position_1]
+                        if pre_filter is not None and not pre_filter(configuration, c_5, match):
+                            continue
+                        derived = symbols[:position_0] + c_6 + symbols[position_0 + 1:position_1] + c_7 + symbols[position_1 + 1:]
+                        yield c_8(String._from_symbols(derived), configuration, c_5, match, depth)
+
+        """
+        lines = [
+            f"def {name}({RULE_ARGUMENTS}):",
+            "    index = sential_form.index",
+        ]
+        for cursor, symbol in enumerate(rule.lhs):
+            lines.extend([
+                f"    positions_{cursor} = index.get({self._constant(namespace, symbol)})",
+                f"    if not positions_{cursor}:",
+                "        return",
+            ])
+        indent = "    "
+        for cursor in range(rule.order):
+            if cursor == 0:
+                lines.append(f"{indent}for position_0 in positions_0:")
+            else:
+                lines.append(
+                    f"{indent}for position_{cursor} in "
+                    f"positions_{cursor}[bisect_right(positions_{cursor}, position_{cursor - 1}):]:"
+                )
+            indent += "    "
+
+        used_rule = self._constant(namespace, rule)
+        match = ", ".join(f"position_{cursor}" for cursor in range(rule.order))
+        lines.extend([
+            f"{indent}match = [{match}]",
+            f"{indent}if pre_filter is not None and not pre_filter(configuration, {used_rule}, match):",
+            f"{indent}    continue",
+        ])
+
+        # derived form is concatenation of untouched parts and right sides
+        parts = []
+        start = ""
+        for cursor, string in enumerate(rule.rhs):
+            parts.append(f"symbols[{start}:position_{cursor}]")
+            if len(string):
+                parts.append(self._constant(namespace, list(string)))
+            start = f"position_{cursor} + 1"
+        parts.append(f"symbols[{start}:]")
+        lines.append(f"{indent}derived = " + " + ".join(parts))
+
+        configuration_class = self._constant(namespace, SCGConfiguration)
+        lines.append(
+            f"{indent}yield {configuration_class}(String._from_symbols(derived), configuration, {used_rule}, match, depth)"
+        )
+        return "\n".join(lines) + "\n"
+
+    @formatter(PhraseGrammar)
+    def PhraseGrammar(self, grammar):
+        """
+        .. code-block:: python
+
+            def rule_0(configuration, sential_form, symbols, length, leftmost, depth, pre_filter):
+                ...
+
+            def direct_derive(configuration):
+                sential_form = configuration.sential_form
+                symbols = sential_form.symbols
+                length = len(symbols)
+                leftmost = _leftmost(symbols)
+                depth = configuration.depth + 1
+                pre_filter = grammar.pre_filter
+                yield from rule_0(configuration, sential_form, symbols, length, leftmost, depth, pre_filter)
+
+        """
+        namespace = {
+            "String": String,
+            "bisect_right": bisect_right,
+            "_leftmost": _leftmost,
+            "grammar": grammar,
+        }
+        functions = []
+        calls = []
+        for i, rule in enumerate(grammar.rules):
+            functions.append(self.export(rule, name=f"rule_{i}", namespace=namespace))
+            calls.append(f"    yield from rule_{i}({RULE_ARGUMENTS})")
+
+        # position of leftmost non-terminal is needed only by context free rules
+        context_free = any(isinstance(rule, ContextFreeRule) for rule in grammar.rules)
+        content = "\n".join(functions) + f"""
+def direct_derive(configuration):
+    sential_form = configuration.sential_form
+    symbols = sential_form.symbols
+    length = len(symbols)
+    leftmost = {"_leftmost(symbols)" if context_free else "None"}
+    depth = configuration.depth + 1
+    pre_filter = grammar.pre_filter
+"""
+        content += "\n".join(calls) + "\n"
+        return CompiledCode(content, namespace)
+
+
+_compiled = count()
+
+
+def compile_grammar(grammar):
+    """Replace ``direct_derive`` of grammar with code specialised to its rules.
+
+    Compiled grammar derives the same configurations in the same order as the original one.
+    On bundled examples compiled derivation is about 1.3 to 1.8 times faster,
+    see ``benchmarks/compiled_derivation.py``.
+    Pre-filters of grammar are honoured, also those set after compilation.
+    PC grammar systems are compiled by compiling all their components.
+    Compiled code is registered in :mod:`linecache`, so tracebacks show generated source.
+    Compiled code contains rules of grammar, it is dropped when rules are replaced or added
+    by :meth:`~grammarlab.grammars.phrase_grammar.PhraseGrammar.add_rule`, grammar has to be compiled again.
+
+    Args:
+        grammar: Grammar to compile. Grammar is modified in place.
+
+    Returns:
+        Compiled grammar.
+
+    """
+    if isinstance(grammar, PCGrammarSystem):
+        for component in grammar.components:
+            compile_grammar(component)
+        return grammar
+
+    code = DerivationCodeExport().export(grammar)
+    filename = f"<grammarlab-compiled-{next(_compiled)}>"
+    linecache.cache[filename] = (len(code.content), None, code.content.splitlines(True), filename)
+    exec(compile(code.content, filename, "exec"), code.namespace)  # pylint: disable=exec-used
+    grammar.direct_derive = code.namespace["direct_derive"]
+    return grammar
@@ -1,5 +1,10 @@
-from typing import Generator, List
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+from operator import itemgetter
+from typing import Any, FrozenSet, Generator, Iterable, List, Optional, Tuple
 
+from grammarlab.core.cache import CacheInfo, SuccessorCache
 from grammarlab.core.common import String, Symbol
 from grammarlab.core.grammar import Configuration, Grammar
 
@@ -40,6 +45,14 @@ class PCConfiguration(Configuration):
     def __eq__(self, other: "PCConfiguration"):
         return isinstance(other, PCConfiguration) and self.data == other.data
 
+    def __hash__(self):
+        return hash(tuple(self.data))
+
+    @property
+    def key(self):
+        """Keys of configurations of all components."""
+        return tuple(component.key for component in self.data)
+
     @property
     def order(self):
         """Order of configuration is number of components."""
@@ -50,11 +63,14 @@ class PCGrammarSystem(Grammar):
     """Parallel Comunicating Grammar System.
     """
     configuration_class = PCConfiguration
+    _component_fingerprints: Optional[List[str]] = None
 
     def __init__(self,
          comumunication_symbols: List[Symbol],
          components: List[Grammar],
-         returning: bool = True
+         returning: bool = True,
+         successor_cache_size: Optional[int] = None,
+         workers: Optional[int] = None,
      ):
         """Create PC grammar system.
         Args:
@@ -62,6 +78,11 @@ class PCGrammarSystem(Grammar):
             components: List of components.
             centralized: If True, only fist component can initialize communication.
             returning: If True, component is returned to its initial state after communication.
+            successor_cache_size: Number of sential forms for which successors are cached in every component.
+                If None or 0, successors are not cached. Cached successors are keyed by fingerprint of component,
+                so changes of its rules and filters are honoured.
+            workers: Number of threads used to derive components concurrently in generation step.
+                If None or 0, components are derived sequentially.
         Returns:
             PCGrammarSystem
         """
@@ -69,6 +90,22 @@ class PCGrammarSystem(Grammar):
         self.components = components
         self.returning = returning
         self.communication_symbols = comumunication_symbols
+        self.successor_caches = [
+            SuccessorCache(successor_cache_size) if successor_cache_size else None for _ in components
+        ]
+        """LRU cache of successors for every component. Key is fingerprint and expansion key of component."""
+        self.workers = workers
+        self._executor = None
+        self._executor_finalizer = None
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state["_executor"] = None
+        state["_executor_finalizer"] = None
+        state["successor_caches"] = [
+            SuccessorCache(cache.maxsize) if cache is not None else None for cache in self.successor_caches
+        ]
+        return state
 
     def __str__(self):
         components = "\n".join(f"Component {i+1}:\n{component}" for i, component in enumerate(self.components))
@@ -77,14 +114,93 @@ Comunication symbols: {self.communication_symbols}
 {components}
 """
 
+    @property
+    def communication_symbols(self) -> List[Symbol]:
+        """Symbols that are used for communication between components. i-th points to i-th component."""
+        return self._communication_symbols
+
+    @communication_symbols.setter
+    def communication_symbols(self, symbols: List[Symbol]):
+        self._communication_symbols = symbols
+        self._fingerprint = None
+        self._communication_set = frozenset(symbols)
+        # first occurrence wins, same as list.index
+        self._communication_component = {}
+        for i, symbol in enumerate(symbols):
+            self._communication_component.setdefault(symbol, i)
+
+    def canonical_form(self) -> Tuple:
+        """Components are described by their fingerprints, order of components and communication symbols is kept."""
+        return (
+            self.__class__.__qualname__,
+            [repr(symbol) for symbol in self.communication_symbols],
+            self.returning,
+            [component.fingerprint for component in self.components],
+            self.filter_keys(),
+        )
+
+    @property
+    def fingerprint_is_stable(self) -> bool:
+        return super().fingerprint_is_stable and all(component.fingerprint_is_stable for component in self.components)
+
+    @property
+    def fingerprint(self) -> str:
+        # components may be changed in place, fingerprint is computed again when fingerprint of some component changes
+        components = [component.fingerprint for component in self.components]
+        if components != self._component_fingerprints:
+            self._component_fingerprints = components
+            self._fingerprint = None
+        return super().fingerprint
+
+    def expansion_key(self, configuration: PCConfiguration) -> Any:
+        """Key of configuration that determines its successors.
+
+        Pre-filters are set on components, so key consists of expansion keys of configurations of components.
+
+        """
+        key = tuple(
+            component.expansion_key(component_configuration)
+            for component, component_configuration in zip(self.components, configuration.data)
+        )
+        if self.pre_filters:
+            return key, super().expansion_key(configuration)
+        return key
+
+    def contains_communication_symbol(self, sential_form: String) -> bool:
+        """Check if sential form contains communication symbol.
+
+        Only keys of index are intersected with communication symbols, so check doesn't depend on length
+        of sential form.
+
+        """
+        index = sential_form.index
+        if index.keys().isdisjoint(self._communication_set):
+            return False
+        # index is defaultdict, lookups may have inserted symbols without positions
+        return any(index.get(symbol) for symbol in self._communication_set)
+
     def communication(self, configuration):
         """Check if configuration contains communication symbol."""
-        for sential_form in configuration.data:
-            for symbol in sential_form.data:
-                if symbol in self.communication_symbols:
-                    return True
-        return False
+        return any(self.contains_communication_symbol(component.sential_form) for component in configuration.data)
+
+
+    def dead_symbols(self, generating: Iterable[Symbol] = ()) -> FrozenSet[Symbol]:
+        """Dead symbols of master component, communication symbols are generating.
 
+        Sential form of configuration is sential form of master, so only master is checked.
+        In returning system queried master returns to its axiom, so its dead symbols can disappear.
+        Dead symbols are reported only if system is non-returning or master is never queried.
+
+        """
+        master_symbol = self.communication_symbols[0] if self.communication_symbols else None
+        if self.returning and master_symbol is not None and any(
+            master_symbol in rhs
+            for component in self.components
+            for rule in component.rules
+            for _, rhs in (rule.productions() or [(None, rule.rhs)])
+        ):
+            return frozenset()
+        return self.components[0].dead_symbols(self._communication_set.union(generating))
 
     @property
     def axiom(self):
@@ -95,105 +211,126 @@ Comunication symbols: {self.communication_symbols}
         """Order of grammar system is number of components."""
         return len(self.components)
 
-    def get_next_configuration(self, generator, component, configuration):
+    def component_successors(self, i: int, configuration: Configuration) -> List[Configuration]:
+        """All configurations derived by i-th component in one generation step.
+
+        If configuration of component is sentence, generation step is skipped and configuration is kept.
+        Components often return to the same sential forms (returning mode resets them to the start symbol),
+        so successors are cached. Cached successors are replayed with configuration as their parent.
+        Pre-filters of component are applied by its rules, so pre-filters are set on components,
+        not on grammar system.
+
+        """
         if configuration.sential_form.is_sentence:
-            # configuration is sentence, generation step is skipped
-            return configuration, True
-        if generator is None:
-            # initialize generator
-            generator = component.direct_derive(configuration)
-            return next(generator, None), generator
-
-        # get next configuration from generator
-        next_sential_form, new_generator = next(generator, None), None
-        if next_sential_form is None:
-            # generator is empty, initialize new generator
-            new_generator = component.direct_derive(configuration)
-            next_sential_form = next(new_generator)
-        return next_sential_form, new_generator
+            return [configuration]
+        cache = self.successor_caches[i]
+        if cache is None:
+            return list(self.components[i].direct_derive(configuration))
+
+        component = self.components[i]
+        # fingerprint is part of key, successors derived before component was changed are not replayed
+        key = component.fingerprint, component.expansion_key(configuration)
+        return cache.successors(key, configuration, component.direct_derive)
+
+    def successor_cache_info(self) -> List[Optional[CacheInfo]]:
+        """Statistics of successor cache of every component, None for components without cache."""
+        return [cache.info() if cache else None for cache in self.successor_caches]
+
+    @property
+    def executor(self) -> Optional[ThreadPoolExecutor]:
+        """Thread pool used to derive components concurrently, created on first use. None if workers are not set.
+
+        Pool is shut down by :meth:`close`, when grammar system is used as context manager,
+        or at the latest when grammar system is garbage collected.
+
+        """
+        if not self.workers:
+            return None
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="grammarlab-pc")
+            self._executor_finalizer = weakref.finalize(self, self._executor.shutdown, wait=False)
+        return self._executor
+
+    def close(self):
+        """Shut down thread pool of the grammar system. Pool is created again if it is needed."""
+        if self._executor is not None:
+            self._executor_finalizer.detach()
+            self._executor.shutdown()
+            self._executor = None
+            self._executor_finalizer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def g_step(self, configuration: PCConfiguration) -> Generator[PCConfiguration, None, None]:
         """Perform generation step.
 
         All combinations of all possible derivations of all components are generated.
-        If component is not able to derive, None is returned.
         For example if first component generate 3 configurations and second 2, 6 configurations are generated
-        by grammar system.
+        by grammar system. If any component is not able to derive, nothing is generated.
+        If workers are set, components are derived concurrently.
 
         """
-        # generators for each component
-        generators = [None] * self.order
-        next_configuration = [None] * self.order
-        first_overflow = True
-        while True:
-            # generation works as odometer
-            # when generator doesn't generate any new configuration (overflow)
-            # it is reset, and generation continues with next component
-            # first overflow of rightmost component is ignored
-            # second overflow of rightmost component ends generation
-            for i in range(self.order):
-                # get next configuration from i-th component
-                next_configuration[i], new_generator = self.get_next_configuration(
-                    generators[i], self.components[i], configuration[i]
-                )
-                if next_configuration[i] is None:
+        # successors of every component are derived only once
+        executor = self.executor
+        if executor is not None and configuration.order > 1:
+            # every task uses only its own component and cache
+            successors = list(executor.map(self.component_successors, range(configuration.order), configuration.data))
+            if not all(successors):
+                # some component cannot generate any configuration
+                return
+        else:
+            successors = []
+            for i, component_configuration in enumerate(configuration):
+                component_successors = self.component_successors(i, component_configuration)
+                if not component_successors:
                     # component cannot generate any configuration
                     return
-                if new_generator:
-                    # component has new generator
-                    generators[i] = new_generator
-                else:
-                    # generator didn't overflow, no need to change other components
-                    break
-            else:
-                if first_overflow:
-                    first_overflow = False
-                else:
-                    break
-
-            configurations = [
-                self.components[i].configuration_class(
-                    c.data.copy(),
-                    c.parent,
-                    c.used_rule,
-                    c.affected,
-                    c.depth,
-                )
-                for i, c in enumerate(next_configuration)
-            ]
-            yield PCConfiguration(configurations, parent=configuration, depth=configuration.depth+1)
+                successors.append(component_successors)
+
+        # first component changes fastest, product is taken over reversed components
+        # configurations of components are never modified, so they are shared by all combinations
+        for combination in product(*reversed(successors)):
+            yield PCConfiguration(list(reversed(combination)), parent=configuration, depth=configuration.depth+1)
 
     def c_step(self, configuration):
         """Perform communication step."""
         copied = [False] * configuration.order
-        new_configuration = [
-            self.components[i].configuration_class(component.data.copy()) for i, component in enumerate(configuration)
-        ]
+        new_configuration = []
         communication_rule = CommunicationRule()
-        for i in range(configuration.order):
-            affected = []
-            sential_form = new_configuration[i].sential_form
+        for i, component in enumerate(configuration):
+            sential_form = component.sential_form
             index = sential_form.index
+            # (position, communicated string) for every communication symbol that can be replaced
+            replacements = []
             for communication_symbol in self.communication_symbols:
-                positions = index.get(communication_symbol, None)
-                if positions is None:
+                positions = index.get(communication_symbol)
+                if not positions:
                     continue
                 # source component
-                referenced_component = self.communication_symbols.index(communication_symbol)
-                if configuration[referenced_component].sential_form.index.keys() & self.communication_symbols:
+                referenced_component = self._communication_component[communication_symbol]
+                source = configuration[referenced_component].sential_form
+                if self.contains_communication_symbol(source):
                     # source component contains communication symbols, communication is not possible
                     continue
-                communication_rule[communication_symbol] = configuration[referenced_component].sential_form
+                communication_rule[communication_symbol] = source
                 copied[referenced_component] = True
-                offset = 0
-                affected.extend(positions)
-                for position in positions:
-                    sential_form.expand(position+offset, configuration[referenced_component].sential_form)
-                    offset += len(configuration[referenced_component].sential_form) - 1
-
-            new_configuration[i].affected = affected
-            if affected:
-                new_configuration[i].used_rule = "communication"
+                replacements.extend((position, source) for position in positions)
+
+            if replacements:
+                # all communication symbols are replaced in one pass
+                replacements.sort(key=itemgetter(0))
+                affected = [position for position, _ in replacements]
+                new_sential_form = sential_form.rewrite(affected, [source for _, source in replacements])
+                new_configuration.append(self.components[i].configuration_class(
+                    new_sential_form, used_rule="communication", affected=affected
+                ))
+            else:
+                # component is not rewritten, its sential form is shared with configuration
+                new_configuration.append(self.components[i].configuration_class(sential_form, affected=[]))
 
         if True not in copied:
             # no component was copied, communication is not possible
@@ -1,10 +1,11 @@
 """Phrase grammar.
 
 """
-from typing import Generator, List
+from typing import Dict, FrozenSet, Generator, Iterable, List, Optional, Tuple
 
+from grammarlab.core.analysis import GrammarAnalysis, generating_symbols
 from grammarlab.core.common import Alphabet, String, Symbol, SymbolType
-from grammarlab.core.grammar import Configuration, Grammar, Rule
+from grammarlab.core.grammar import Configuration, Grammar, PreFilter, Region, Rule
 
 
 class PhraseConfiguration(Configuration):
@@ -45,7 +46,7 @@ class PhraseRule(Rule):
 
         """
         index = sential_form.index
-        for pos in index[self.lhs[0]]:
+        for pos in index.get(self.lhs[0], ()):
             if len(sential_form) < pos + len(self.lhs):
                 continue
             for offset, symbol in enumerate(self.lhs):
@@ -54,11 +55,27 @@ class PhraseRule(Rule):
             else:
                 yield pos
 
-    def apply(self, configuration):
+    def rewritten_regions(self, affected: int) -> List[Region]:
+        """Left side at position affected is rewritten to right side."""
+        return [Region(affected, affected + len(self.lhs), affected, affected + len(self.rhs))]
+
+    @property
+    def key(self) -> Tuple:
+        """Class of rule and symbols of both sides."""
+        return self.__class__, tuple(self.lhs), tuple(self.rhs)
+
+    def productions(self) -> Optional[List[Tuple[Symbol, String]]]:
+        """Rule with single symbol on left side is context-free production itself."""
+        if len(self.lhs) != 1:
+            return None
+        return [(self.lhs[0], self.rhs)]
+
+    def apply(self, configuration, pre_filter: Optional[PreFilter] = None):
         """Apply rule to configuration.
 
         Args:
             configuration: Configuration to apply rule to.
+            pre_filter: Matches for which pre_filter returns False are skipped.
 
         Returns:
             Generator of new configurations.
@@ -68,9 +85,10 @@ class PhraseRule(Rule):
         sential_form = configuration.sential_form
         matches = self.match(sential_form)
         for match in matches:
-            new_sential_form = sential_form.copy()
+            if pre_filter is not None and not pre_filter(configuration, self, match):
+                continue
             # replace lhs with rhs
-            new_sential_form.expand(match, self.rhs, expand_symbols=len(self.lhs))
+            new_sential_form = sential_form.rewrite([match], [self.rhs], expand_symbols=len(self.lhs))
             new_configuration = PhraseConfiguration(new_sential_form, parent=configuration, used_rule=self, affected=match, depth=configuration.depth+1)
             yield new_configuration
 
@@ -89,17 +107,141 @@ class PhraseGrammar(Grammar):
         start_symbol: Symbol,
     ):
         super().__init__()
+        self._analysis = None
         self.non_terminals = non_terminals
         self.terminals = terminals
         self.rules = rules
         self.start_symbol = start_symbol
 
+    def __getstate__(self):
+        state = super().__getstate__()
+        state["_analysis"] = None
+        return state
+
+    @property
+    def non_terminals(self) -> Alphabet:
+        return self._non_terminals
+
+    @non_terminals.setter
+    def non_terminals(self, non_terminals: Alphabet):
+        self._non_terminals = non_terminals
+        self._analysis = None
+        self._fingerprint = None
+
+    @property
+    def terminals(self) -> Alphabet:
+        return self._terminals
+
+    @terminals.setter
+    def terminals(self, terminals: Alphabet):
+        self._terminals = terminals
+        self._analysis = None
+        self._fingerprint = None
+
+    @property
+    def rules(self) -> List[PhraseRule]:
+        """Rules of grammar. List should be modified only by :meth:`add_rule`, so analysis stays valid."""
+        return self._rules
+
+    @rules.setter
+    def rules(self, rules: List[PhraseRule]):
+        self._rules = rules
+        self._analysis = None
+        self._fingerprint = None
+        self._drop_compiled()
+
+    @property
+    def start_symbol(self) -> Symbol:
+        return self._start_symbol
+
+    @start_symbol.setter
+    def start_symbol(self, start_symbol: Symbol):
+        self._start_symbol = start_symbol
+        self._analysis = None
+        self._fingerprint = None
+
+    def add_rule(self, rule: PhraseRule):
+        """Add rule to grammar, facts already computed by analysis are updated."""
+        self._rules.append(rule)
+        self._fingerprint = None
+        self._drop_compiled()
+        if self._analysis is not None:
+            self._analysis.add_rule(rule)
+
+    def _drop_compiled(self):
+        """Drop ``direct_derive`` compiled by :func:`grammarlab.export.derivation_code.compile_grammar`.
+
+        Compiled code contains rules of grammar at time of compilation, so it is invalid once rules change.
+
+        """
+        if "direct_derive" in self.__dict__:
+            del self.direct_derive
+
+    @property
+    def analysis(self) -> GrammarAnalysis:
+        """Static analysis of grammar. It is created lazily and dropped when rules or alphabets are replaced."""
+        if self._analysis is None:
+            self._analysis = GrammarAnalysis(self)
+        return self._analysis
+
+    def canonical_form(self) -> Tuple:
+        return (
+            self.__class__.__qualname__,
+            sorted(map(repr, self.non_terminals)),
+            sorted(map(repr, self.terminals)),
+            sorted(repr(rule.key) for rule in self.rules),
+            repr(self.start_symbol),
+            self.filter_keys(),
+        )
+
     @property
     def axiom(self):
         """Configuration that starts derivation.
         """
         return PhraseConfiguration(String([self.start_symbol]))
 
+    def productions(self) -> Optional[List[Tuple[Symbol, String]]]:
+        """Context-free productions that can perform every rule, None if some rule can't be performed by them."""
+        productions = []
+        for rule in self.rules:
+            rule_productions = rule.productions()
+            if rule_productions is None:
+                return None
+            productions.extend(rule_productions)
+        return productions
+
+    def dead_symbols(self, generating: Iterable[Symbol] = ()) -> FrozenSet[Symbol]:
+        """Non-terminals that are not generating, computed only if every rule can be performed by productions.
+
+        Some grammars list terminals in their non-terminal alphabet, terminals are never dead.
+
+        """
+        analysis = self.analysis
+        if not analysis.context_free:
+            return frozenset()
+        generating = set(generating)
+        if generating:
+            generating = generating_symbols(analysis.productions, analysis.generating | generating)
+        else:
+            generating = analysis.generating
+        return frozenset(
+            symbol for symbol in self.non_terminals
+            if symbol not in generating and symbol.type != SymbolType.TERMINAL and symbol not in self.terminals
+        )
+
+    def minimum_yields(self) -> Optional[Dict[Symbol, float]]:
+        """Minimal length of sentence derivable from every symbol.
+
+        If every rule can be performed by context-free productions, yields are computed from them.
+        Otherwise, if grammar is noncontracting, every symbol yields at least one symbol.
+
+        """
+        if self.analysis.context_free:
+            return self.analysis.minimum_yields
+        if all(len(rule.rhs) >= len(rule.lhs) for rule in self.rules):
+            return {}
+        return None
+
     def direct_derive(self, configuration: PhraseConfiguration) -> Generator[PhraseConfiguration, None, None]:
         """One derivation step.
 
@@ -111,8 +253,9 @@ class PhraseGrammar(Grammar):
 
         """
         # Apply all rules to configuration
+        pre_filter = self.pre_filter
         for rule in self.rules:
-            yield from rule.apply(configuration)
+            yield from rule.apply(configuration, pre_filter)
 
 
 class ContextFreeRule(PhraseRule):
@@ -142,6 +285,34 @@ class ContextFreeRule(PhraseRule):
 
 
 
+def canonical_order(configuration: PhraseConfiguration, rule: PhraseRule, match: int) -> bool:
+    """Pre-filter that allows independent rewrites only in left to right order.
+
+    Rewrite that doesn't touch symbols derived by previous rewrite and is left of them can be
+    swapped with previous rewrite. So every derivation can be reordered, so that no rewrite
+    is completely left of right side of the previous one. This generalises leftmost derivation
+    of context free grammars. Generated language and depths of sentences are preserved,
+    but only one order of independent rewrites is derived.
+    Filter doesn't restrict scattered context rules.
+
+    Filters that reject intermediate sential forms may reject the reordered derivation.
+
+    Example:
+        >>> from grammarlab.grammars import CS
+        >>> grammar = CS({"S", "A", "B"}, {"a", "b"}, [("S", "AB"), ("A", "a"), ("B", "b")], "S")
+        >>> len(list(grammar.derive(3)))
+        2
+        >>> grammar.set_pre_filter(canonical_order)
+        >>> len(list(grammar.derive(3)))
+        1
+
+    """
+    previous = configuration.affected
+    if not isinstance(previous, int) or not isinstance(match, int):
+        return True
+    return match + len(rule.lhs) > previous
+
+
 def length_preserving(grammar: PhraseGrammar):
     """Check if grammar is length preserving.
 
@@ -1,6 +1,9 @@
-from typing import Dict, List
+import random
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple
 
 from grammarlab.core.common import NonTerminal, String, Symbol, SymbolType
+from grammarlab.core.grammar import PreFilter, Region
 from grammarlab.grammars.phrase_grammar import (
     PhraseConfiguration,
     PhraseGrammar,
@@ -53,8 +56,10 @@ class ScatteredContextRule(PhraseRule):
     ):
         """Find next usable match of symbol in string.
 
+        Positions in index are sorted, so the match is found by binary search.
+
         Args:
-            index: Dict where key is symbol and value is list of positions of symbol in string.
+            index: Dict where key is symbol and value is sorted list of positions of symbol in string.
             string_position: Position of last used symbol in string. Only symbol after this position can be used.
             last: Position of last used symbol in index. Symbols before last are already used.
             symbol: Symbol we are trying to match.
@@ -62,11 +67,12 @@ class ScatteredContextRule(PhraseRule):
             Position of next usable match of symbol in string or -1 if there is no such match.
 
         """
+        positions = index.get(symbol)
+        if not positions:
+            return -1
         start = 0 if last == -1 else last + 1
-        for i in range(start, len(index[symbol])):
-            if index[symbol][i] > string_position:
-                return i
-        return -1
+        i = bisect_right(positions, string_position, start)
+        return i if i < len(positions) else -1
 
     def match(self, string: String):
         """Find all matches of rule in string."""
@@ -102,11 +108,102 @@ class ScatteredContextRule(PhraseRule):
                 # move to next symbol in lhs
                 cursor += 1
 
-    def apply(self, configuration: SCGConfiguration):
+    def _match_counts(self, string: String):
+        """Count matches of every suffix of left side.
+
+        ``counts[cursor][i]`` is number of matches of ``lhs[cursor:]`` in which ``lhs[cursor]``
+        is matched to position ``positions[cursor][i]``. Counts are computed from the last symbol
+        of left side to the first one, every count is suffix sum of counts of the next symbol.
+
+        Args:
+            string: String to match rule against.
+        Returns:
+            Tuple of positions of every symbol of left side and match counts.
+
+        """
+        index = string.index
+        positions = [index.get(symbol) or [] for symbol in self.lhs]
+        counts = [None] * self.order
+        # last symbol can be matched at each of its positions in exactly one way
+        counts[-1] = [1] * len(positions[-1])
+        for cursor in range(self.order - 2, -1, -1):
+            next_positions, next_counts = positions[cursor + 1], counts[cursor + 1]
+            suffix_sums = [0] * (len(next_counts) + 1)
+            for i in range(len(next_counts) - 1, -1, -1):
+                suffix_sums[i] = suffix_sums[i + 1] + next_counts[i]
+            counts[cursor] = [suffix_sums[bisect_right(next_positions, position)] for position in positions[cursor]]
+        return positions, counts
+
+    def count_matches(self, string: String) -> int:
+        """Count all matches of rule in string without enumerating them.
+
+        Args:
+            string: String to match rule against.
+        Returns:
+            Number of matches that :meth:`match` would yield.
+
+        """
+        _, counts = self._match_counts(string)
+        return sum(counts[0])
+
+    def sample_match(self, string: String, rng: Optional[random.Random] = None) -> Optional[List[int]]:
+        """Draw uniformly random match of rule in string without enumerating all matches.
+
+        Every symbol of left side is matched to position chosen with probability
+        proportional to number of matches of rest of left side that follow it.
+
+        Args:
+            string: String to match rule against.
+            rng: Source of randomness. Module :mod:`random` is used if None.
+        Returns:
+            Random match or None if rule doesn't match string.
+
+        """
+        rng = rng or random
+        positions, counts = self._match_counts(string)
+        match = []
+        start = 0
+        for cursor in range(self.order):
+            if cursor > 0:
+                # only positions after last matched symbol are usable
+                start = bisect_right(positions[cursor], match[-1])
+            total = sum(counts[cursor][start:])
+            if not total:
+                return None
+            chosen = rng.randrange(total)
+            for i in range(start, len(counts[cursor])):
+                chosen -= counts[cursor][i]
+                if chosen < 0:
+                    match.append(positions[cursor][i])
+                    break
+        return match
+
+    def rewritten_regions(self, affected: List[int]) -> List[Region]:
+        """Every symbol of left side is rewritten to corresponding string of right side."""
+        regions = []
+        offset = 0
+        for position, string in zip(affected, self.rhs):
+            new_start = position + offset
+            length = len(string.symbols)
+            regions.append(Region(position, position + 1, new_start, new_start + length))
+            offset += length - 1
+        return regions
+
+    @property
+    def key(self) -> Tuple:
+        """Class of rule, symbols of left side and symbols of every string of right side."""
+        return self.__class__, tuple(self.lhs), tuple(tuple(string) for string in self.rhs)
+
+    def productions(self) -> List[Tuple[NonTerminal, String]]:
+        """Every symbol of left side can be rewritten to its string independently of the others."""
+        return list(zip(self.lhs, self.rhs))
+
+    def apply(self, configuration: SCGConfiguration, pre_filter: Optional[PreFilter] = None):
         """Apply rule to configuration.
 
         Args:
             configuration: Configuration to which rule is applied.
+            pre_filter: Matches for which pre_filter returns False are skipped.
         Returns:
             Generator of new configurations.
 
@@ -114,12 +211,10 @@ class ScatteredContextRule(PhraseRule):
         sential_form = configuration.sential_form
         matches = self.match(sential_form)
         for match in matches:
-            derived = sential_form.copy()
-            offset = 0
-            for cursor in range(self.order):
-                derived.expand(match[cursor]+offset, self.rhs[cursor])
-                # if we insert string of length n, all positions after it are shifted by n-1
-                offset += len(self.rhs[cursor]) - 1
+            if pre_filter is not None and not pre_filter(configuration, self, match):
+                continue
+            # all symbols of lhs are replaced in one pass
+            derived = sential_form.rewrite(match, self.rhs)
             new_configuration = SCGConfiguration(
                 derived,
                 parent=configuration,
@@ -141,9 +236,10 @@ class ScatteredContextGrammar(PhraseGrammar):
 
     def direct_derive(self, configuration):
         """Perform direct derivation on configuration."""
+        pre_filter = self.pre_filter
         for rule in self.rules:
             try:
-                yield from rule.apply(configuration)
+                yield from rule.apply(configuration, pre_filter)
             except Exception as e:
                 print(f"Error while applying rule: {rule}")
                 raise e
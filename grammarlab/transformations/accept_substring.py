@@ -1,15 +1,26 @@
 import itertools
+from typing import Optional
 
 from grammarlab.core.common import Alphabet, String, SymbolType
 from grammarlab.core.config import Color
 from grammarlab.core.extended_symbol import ExtendedSymbol, get_symbol_factories
-from grammarlab.core.grammar import grammar_filter
+from grammarlab.core.filter import (
+    IncrementalFilter,
+    filter_key,
+    first_position,
+    last_position,
+    shift_position,
+    update_first,
+    update_last,
+)
+from grammarlab.core.grammar import RuleSet, grammar_filter
 from grammarlab.grammars.pc_grammar_system import PCGrammarSystem
 from grammarlab.grammars.scattered_context_grammar import (
     ScatteredContextGrammar as Grammar,
 )
 from grammarlab.grammars.scattered_context_grammar import ScatteredContextRule as Rule
 from grammarlab.grammars.scattered_context_grammar import SCGConfiguration
+from grammarlab.transformations.cache import cached_transformation
 
 
 class PCSymbol(ExtendedSymbol):
@@ -34,8 +45,14 @@ class PCSymbol(ExtendedSymbol):
 
 N, T = get_symbol_factories(PCSymbol)
 ignore = [T("*")]
+_R_1, _R_2, _R_3, _Q_A = N("R_1"), N("R_2"), N("R_3"), N("Q_A")
+_ATTRIBUTES = PCSymbol.attributes
+_NON_TERMINAL = _ATTRIBUTES.variant_code("non_terminal")
+_DELIMITER = _ATTRIBUTES.base_code("#")
+"""States of component B checked by filters, created once so filters don't construct them on every call."""
 
 
+@cached_transformation("accept_substring")
 def construct_grammar(G, separator, apply_filters=True):
     N_G = G.non_terminals
     T_G = G.terminals
@@ -75,7 +92,7 @@ def construct_grammar(G, separator, apply_filters=True):
             Rule([symbol.end], [symbol.end]),
         ])
 
-    C = Grammar(Alphabet(N_communication | N_end | {S_C, W}), Alphabet(set()), P_C, S_C)
+    C = Grammar(Alphabet(N_communication | N_end | {S_C, W}), Alphabet(set()), list(RuleSet(P_C)), S_C)
 
     S_A = N("S_A")
     P_A = [
@@ -89,7 +106,7 @@ def construct_grammar(G, separator, apply_filters=True):
             Rule([symbol.non_terminal], [symbol.terminal]),
         ])
 
-    A = Grammar(Alphabet(N_communication | N_end | set(K) | {S_A, W} | N_original), Alphabet(T_original), P_A, S_A)
+    A = Grammar(Alphabet(N_communication | N_end | set(K) | {S_A, W} | N_original), Alphabet(T_original), list(RuleSet(P_A)), S_A)
 
     S_B = N("S_B")
     R_0, R_1, R_2, R_3 = N("R_0"), N("R_1"), N("R_2"), N("R_3")
@@ -143,7 +160,7 @@ def construct_grammar(G, separator, apply_filters=True):
     B = Grammar(
         Alphabet(N_communication | N_end | N_pointer | N_original | {S_B, W, E} | set(K) | R),
         Alphabet(T_original),
-        P_B,
+        list(RuleSet(P_B)),
         S_B
     )
 
@@ -154,71 +171,153 @@ def construct_grammar(G, separator, apply_filters=True):
         grammar.set_filter(finish_from_left_to_right)
         grammar.set_filter(communication_left_to_right)
         for origin_filter in G.filters:
-            grammar.set_filter(translate_to_origin(origin_filter))
+            grammar.set_filter(TranslateToOrigin(origin_filter))
 
     return grammar
 
 
-def translate_to_origin(origin_filter):
-    def wrapper(configuration):
-        sential_form = configuration[1]
-        if sential_form.sential_form[0] != N("R_1"):
+class TranslateToOrigin:
+    """Filter that evaluates filter of original grammar on sential form of component B in state R_1.
+
+    Translated configuration is stored in state of filters of component B,
+    so it is created only once for all filters of original grammar.
+
+    """
+    def __init__(self, origin_filter):
+        self.origin_filter = origin_filter
+        self.__name__ = getattr(origin_filter, "__name__", "origin_filter")
+
+    def canonical_form(self) -> Optional[str]:
+        """Wrapped filter is part of description, None if it has no description."""
+        origin = filter_key(self.origin_filter)
+        return None if origin is None else f"{__name__}.TranslateToOrigin({origin})"
+
+    @staticmethod
+    def translate(configuration):
+        """Configuration of original grammar simulated by component B."""
+        if configuration.filter_state is None:
+            configuration.filter_state = {}
+        translated = configuration.filter_state.get(TranslateToOrigin)
+        if translated is None:
+            translated = SCGConfiguration(String(
+                [symbol.base_symbol for symbol in configuration.sential_form[1:]]
+            ))
+            configuration.filter_state[TranslateToOrigin] = translated
+        return translated
+
+    def __call__(self, configuration):
+        component = configuration[1]
+        if component.sential_form[0] != _R_1:
             return True
-        new_configuration = SCGConfiguration(String(
-            [symbol.base_symbol for symbol in sential_form.sential_form[1:]]
-        ))
-        return origin_filter(new_configuration)
-    return wrapper
+        return self.origin_filter(self.translate(component))
 
 
 @grammar_filter
 def copy_after_finish(configuration):
     B = configuration[1].sential_form
-    if B[0] == N("R_2"):
+    if B[0] == _R_2:
         for symbol in B[1:]:
             if symbol.base_symbol.type == SymbolType.NON_TERMINAL:
                 return False
     return True
 
 
-@grammar_filter
-def finish_from_left_to_right(configuration):
-    B = configuration[1].sential_form
-    if B[0] == N("R_2"):
-        non_terminal = False
-        for symbol in B[1:]:
-            if symbol.variant == "non_terminal":
-                non_terminal = True
-            elif symbol.variant == "terminal" and symbol not in ignore:
-                if non_terminal:
-                    return False
-    return True
+def _is_non_terminal(symbol):
+    return symbol.variant == "non_terminal"
+
+
+def _is_terminal(symbol):
+    return symbol.variant == "terminal" and symbol not in ignore
+
+
+class FinishFromLeftToRight(IncrementalFilter):
+    """In state R_2 no terminal follows non-terminal in component B.
+
+    State is position of the first non-terminal and position of the last terminal.
+
+    """
+    def initialize(self, sential_form):
+        symbols = sential_form.symbols
+        return first_position(_is_non_terminal, symbols), last_position(_is_terminal, symbols)
+
+    def update(self, state, parent_form, sential_form, regions):
+        non_terminal, terminal = state
+        symbols = sential_form.symbols
+        return (
+            update_first(non_terminal, _is_non_terminal, symbols, regions),
+            update_last(terminal, _is_terminal, symbols, regions),
+        )
+
+    def applies(self, sential_form):
+        return sential_form[0] == _R_2
+
+    def accept(self, state):
+        non_terminal, terminal = state
+        return non_terminal is None or terminal is None or terminal < non_terminal
+
+
+finish_from_left_to_right = FinishFromLeftToRight("finish_from_left_to_right", component=1)
 
 
 @grammar_filter
 def finish_part_before_separator(configuration):
     B = configuration[1].sential_form
-    if B[0] == N("R_3") and B[1] == N("Q_A"):
-        for symbol in B[2:]:
-            if symbol.base_symbol.id == "#":
-                return True
-            if symbol.variant == "non_terminal":
-                return False
+    if B[0] == _R_3 and B[1] == _Q_A:
+        # attributes of symbols are compared as vectors
+        codes = _ATTRIBUTES.encode(B.symbols[2:])
+        non_terminal = _ATTRIBUTES.first(codes, variant=_NON_TERMINAL)
+        if non_terminal is None:
+            return True
+        delimiter = _ATTRIBUTES.first(codes, base=_DELIMITER)
+        return delimiter is not None and delimiter <= non_terminal
     return True
 
-@grammar_filter
-def communication_left_to_right(configuration):
-    B = configuration[1].sential_form
-    if B[0] == N("R_3"):
-        delimiter = False
-        non_terminal = False
-        for symbol in B[1:]:
-            if symbol.base_symbol.id == "#":
-                delimiter = True
-            elif delimiter:
-                if symbol.variant == "non_terminal":
-                    non_terminal = True
-                elif symbol.variant in ["terminal", "pointer"] and symbol not in ignore:
-                    if non_terminal:
-                        return False
-    return True
+def _is_delimiter(symbol):
+    return symbol.base_symbol.id == "#"
+
+
+def _is_communicated_non_terminal(symbol):
+    return symbol.variant == "non_terminal" and not _is_delimiter(symbol)
+
+
+def _is_communicated_terminal(symbol):
+    return symbol.variant in ["terminal", "pointer"] and symbol not in ignore and not _is_delimiter(symbol)
+
+
+class CommunicationLeftToRight(IncrementalFilter):
+    """In state R_3 no terminal or pointer follows non-terminal after delimiter in component B.
+
+    State is position of the delimiter, position of the first non-terminal after delimiter
+    and position of the last terminal or pointer.
+
+    """
+    def initialize(self, sential_form):
+        symbols = sential_form.symbols
+        delimiter = first_position(_is_delimiter, symbols)
+        non_terminal = None
+        if delimiter is not None:
+            non_terminal = first_position(_is_communicated_non_terminal, symbols, delimiter + 1)
+        return delimiter, non_terminal, last_position(_is_communicated_terminal, symbols)
+
+    def update(self, state, parent_form, sential_form, regions):
+        delimiter, non_terminal, terminal = state
+        symbols = sential_form.symbols
+        new_delimiter = update_first(delimiter, _is_delimiter, symbols, regions)
+        if new_delimiter is None:
+            non_terminal = None
+        elif delimiter is None or new_delimiter != shift_position(delimiter, regions):
+            # delimiter moved, non-terminals are searched again
+            non_terminal = first_position(_is_communicated_non_terminal, symbols, new_delimiter + 1)
+        else:
+            non_terminal = update_first(non_terminal, _is_communicated_non_terminal, symbols, regions, new_delimiter + 1)
+        return new_delimiter, non_terminal, update_last(terminal, _is_communicated_terminal, symbols, regions)
+
+    def applies(self, sential_form):
+        return sential_form[0] == _R_3
+
+    def accept(self, state):
+        _, non_terminal, terminal = state
+        return non_terminal is None or terminal is None or terminal < non_terminal
+
+
+communication_left_to_right = CommunicationLeftToRight("communication_left_to_right", component=1)
@@ -0,0 +1,137 @@
+"""On-disk cache of results of transformations.
+
+Transformations decorated by :func:`cached_transformation` store resulting grammar in directory
+:const:`grammarlab.core.config.TRANSFORMATION_CACHE`. File of result is addressed by
+:attr:`~grammarlab.core.grammar.Grammar.fingerprint` of transformed grammar, name and version
+of transformation and its other arguments, so warm run loads grammar from compressed pickle
+instead of constructing it again.
+
+Example:
+    .. code-block:: python
+
+        from grammarlab.core import config
+        from grammarlab.transformations.pcgs_pscg_re_equivalence import construct_grammar
+
+        config.TRANSFORMATION_CACHE = ".grammarlab-cache"
+        new_grammar = construct_grammar(grammar)  # constructed and stored
+        new_grammar = construct_grammar(grammar)  # loaded from cache
+
+Version of transformation has to be increased whenever transformation starts to produce different grammar,
+otherwise stale results are loaded. Grammars are pickled, so filters of resulting grammar have to be
+defined on module level. Results that can't be pickled are not cached.
+
+"""
+
+import gzip
+import hashlib
+import inspect
+import logging
+import os
+import pickle
+import tempfile
+from functools import wraps
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from grammarlab.core import config
+from grammarlab.core.grammar import Grammar
+
+log = logging.getLogger("grammarlab.TransformationCache")
+
+
+def cache_path(directory: str, name: str, version: int, grammar: Grammar, arguments: dict) -> Path:
+    """Path of file with result of transformation.
+
+    Args:
+        directory: Directory of cache.
+        name: Name of transformation.
+        version: Version of transformation.
+        grammar: Transformed grammar.
+        arguments: Other arguments of transformation, their representations are part of key.
+
+    """
+    key = repr((name, version, grammar.fingerprint, sorted((key, repr(value)) for key, value in arguments.items())))
+    return Path(directory) / f"{name}-{hashlib.sha256(key.encode()).hexdigest()}.pickle.gz"
+
+
+def load(path: Path) -> Optional[Grammar]:
+    """Load grammar from cache file, None if file is missing or can't be loaded."""
+    try:
+        with gzip.open(path, "rb") as file:
+            return pickle.load(file)
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError) as error:
+        log.warning("Cached grammar %s can't be loaded: %s", path, error)
+        return None
+
+
+def store(path: Path, grammar: Grammar):
+    """Store grammar to cache file, grammar that can't be pickled is not stored.
+
+    File is written under temporary name and renamed, so concurrent runs never load partially written file.
+
+    """
+    try:
+        data = pickle.dumps(grammar, protocol=pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError) as error:
+        log.warning("Grammar can't be cached: %s", error)
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(gzip.compress(data))
+        os.replace(temporary, path)
+    except OSError as error:
+        log.warning("Grammar can't be cached: %s", error)
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def cached_transformation(name: str, version: int = 1, ignore: Iterable[str] = ()) -> Callable:
+    """Decorator that caches results of transformation of grammar on disk.
+
+    Decorated function takes transformed grammar as its first argument and returns new grammar.
+    Results are cached only if :const:`grammarlab.core.config.TRANSFORMATION_CACHE` is set
+    and fingerprint of grammar is the same in every process, see :attr:`Grammar.fingerprint_is_stable`.
+
+    Args:
+        name: Name of transformation, part of file name.
+        version: Version of transformation, increase it when transformation changes.
+        ignore: Arguments that don't change result, for example tracer. They are not part of key,
+            so they have no effect if result is loaded from cache.
+
+    Returns:
+        Decorator.
+
+    """
+    ignore = set(ignore)
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        def wrapper(grammar, *args, **kwargs):
+            directory = config.TRANSFORMATION_CACHE
+            if directory is None:
+                return func(grammar, *args, **kwargs)
+            if not grammar.fingerprint_is_stable:
+                log.info("Grammar has filters without stable description, result of %s is not cached.", name)
+                return func(grammar, *args, **kwargs)
+
+            bound = signature.bind(grammar, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = {
+                key: value for key, value in list(bound.arguments.items())[1:] if key not in ignore
+            }
+            path = cache_path(directory, name, version, grammar, arguments)
+            result = load(path)
+            if result is not None:
+                log.info("Result of %s loaded from %s.", name, path)
+                return result
+            result = func(grammar, *args, **kwargs)
+            store(path, result)
+            return result
+        return wrapper
+    return decorator
@@ -3,11 +3,21 @@ import itertools
 from grammarlab.core.common import Alphabet, SymbolType
 from grammarlab.core.config import Color
 from grammarlab.core.extended_symbol import ExtendedSymbol, get_symbol_factories
-from grammarlab.core.grammar import grammar_filter
+from grammarlab.core.filter import (
+    IncrementalFilter,
+    count_change,
+    first_position,
+    last_position,
+    shift_position,
+    update_first,
+    update_last,
+)
+from grammarlab.core.grammar import RuleSet, grammar_filter
 from grammarlab.grammars.scattered_context_grammar import (
     ScatteredContextGrammar as Grammar,
 )
 from grammarlab.grammars.scattered_context_grammar import ScatteredContextRule as Rule
+from grammarlab.transformations.cache import cached_transformation
 
 
 class SCGSymbol(ExtendedSymbol):
@@ -32,6 +42,7 @@ class SCGSymbol(ExtendedSymbol):
 N, T = get_symbol_factories(SCGSymbol)
 
 
+@cached_transformation("derivation_sequence_in_scg")
 def construct_grammar(G, apply_filters=True):
     N_G = G.non_terminals
     T_G = G.terminals
@@ -172,7 +183,7 @@ def construct_grammar(G, apply_filters=True):
 
     P_H = [p_init] + P_Q1 + P_Q2 + P_Q3 + P_Q4 + P_Q5 + P_Q6 + P_Q7
 
-    grammar = Grammar(N_H, T_H, P_H, S_H)
+    grammar = Grammar(N_H, T_H, list(RuleSet(P_H)), S_H)
 
     if apply_filters:
         grammar.set_filter(max_one_B)
@@ -183,13 +194,43 @@ def construct_grammar(G, apply_filters=True):
     return grammar
 
 
-@grammar_filter
-def max_one_B(configuration):
-    count = 0
-    for symbol in configuration.sential_form:
-        if symbol.variant == "non_terminal" and symbol.base_symbol.id == "B":
-            count += 1
-    return count <= 1
+def _is_B(symbol):
+    return symbol.variant == "non_terminal" and symbol.base_symbol.id == "B"
+
+
+def _is_non_terminal(symbol):
+    return symbol.variant == "non_terminal"
+
+
+def _is_terminal(symbol):
+    return symbol.variant == "terminal"
+
+
+def _is_pointer(symbol):
+    return symbol.variant == "pointer"
+
+
+def _is_workspace(symbol):
+    return symbol.id == "["
+
+
+class MaxOneB(IncrementalFilter):
+    """At most one non-terminal variant of B is in sential form. State is number of them."""
+    def initialize(self, sential_form):
+        count = 0
+        for symbol in sential_form:
+            if symbol.variant == "non_terminal" and symbol.base_symbol.id == "B":
+                count += 1
+        return count
+
+    def update(self, state, parent_form, sential_form, regions):
+        return state + count_change(_is_B, parent_form.symbols, sential_form.symbols, regions)
+
+    def accept(self, state):
+        return state <= 1
+
+
+max_one_B = MaxOneB("max_one_B")
 
 
 @grammar_filter
@@ -202,35 +243,67 @@ def non_terminal_before_working_space(configuration):
     return True
 
 
-@grammar_filter
-def symbol_not_copied(configuration):
-    sential_form = configuration.sential_form
-    if sential_form[0].id not in ["Q_3", "Q_5"]:
-        return True
-    not_copied = False
-    for symbol in sential_form:
-        if symbol.variant == "non_terminal":
-            not_copied = True
-        if symbol.variant == "pointer":
-            return not not_copied
-    return True
+class SymbolNotCopied(IncrementalFilter):
+    """In states Q_3 and Q_5 no non-terminal is before the first pointer.
 
+    State is position of the first non-terminal and position of the first pointer.
 
-@grammar_filter()
-def finish_left_to_right(configuration):
-    sential_form = configuration.sential_form
-    if sential_form[0].id != "Q_7":
-        return True
+    """
+    def initialize(self, sential_form):
+        symbols = sential_form.symbols
+        return first_position(_is_non_terminal, symbols), first_position(_is_pointer, symbols)
 
-    in_workspace = False
-    non_terminal = False
-    for symbol in sential_form:
-        if symbol.id == "[":
-            in_workspace = True
-        if in_workspace:
-            if symbol.variant == "non_terminal":
-                non_terminal = True
-            if symbol.variant == "terminal":
-                if non_terminal:
-                    return False
-    return True
+    def update(self, state, parent_form, sential_form, regions):
+        non_terminal, pointer = state
+        symbols = sential_form.symbols
+        return (
+            update_first(non_terminal, _is_non_terminal, symbols, regions),
+            update_first(pointer, _is_pointer, symbols, regions),
+        )
+
+    def applies(self, sential_form):
+        return sential_form[0].id in ["Q_3", "Q_5"]
+
+    def accept(self, state):
+        non_terminal, pointer = state
+        return pointer is None or non_terminal is None or non_terminal > pointer
+
+
+symbol_not_copied = SymbolNotCopied("symbol_not_copied")
+
+
+class FinishLeftToRight(IncrementalFilter):
+    """In state Q_7 no terminal follows non-terminal in working space.
+
+    State is position of working space, position of the first non-terminal in working space
+    and position of the last terminal.
+
+    """
+    def initialize(self, sential_form):
+        symbols = sential_form.symbols
+        workspace = first_position(_is_workspace, symbols)
+        non_terminal = None if workspace is None else first_position(_is_non_terminal, symbols, workspace)
+        return workspace, non_terminal, last_position(_is_terminal, symbols)
+
+    def update(self, state, parent_form, sential_form, regions):
+        workspace, non_terminal, terminal = state
+        symbols = sential_form.symbols
+        new_workspace = update_first(workspace, _is_workspace, symbols, regions)
+        if new_workspace is None:
+            non_terminal = None
+        elif workspace is None or new_workspace != shift_position(workspace, regions):
+            # working space moved, non-terminals are searched again
+            non_terminal = first_position(_is_non_terminal, symbols, new_workspace)
+        else:
+            non_terminal = update_first(non_terminal, _is_non_terminal, symbols, regions, new_workspace)
+        return new_workspace, non_terminal, update_last(terminal, _is_terminal, symbols, regions)
+
+    def applies(self, sential_form):
+        return sential_form[0].id == "Q_7"
+
+    def accept(self, state):
+        _, non_terminal, terminal = state
+        return non_terminal is None or terminal is None or terminal < non_terminal
+
+
+finish_left_to_right = FinishLeftToRight("finish_left_to_right")
@@ -0,0 +1,191 @@
+"""Optimization of grammars that reduces number of rules without changing generated language.
+
+Every rule is tried in every derivation step, so rules that are duplicate, that only rename
+symbols in a cycle or that can never take part in derivation of sentence only increase
+branching factor of derivation.
+
+Example:
+    >>> from grammarlab.grammars import CF
+    >>> grammar = CF({"S", "A", "B"}, {"a"}, [("S", "A"), ("A", "S"), ("A", "a"), ("S", "a"), ("B", "a")], "S")
+    >>> [str(rule) for rule in optimize(grammar).rules]
+    ['S -> a']
+
+"""
+
+from typing import Dict, List
+
+from grammarlab.core.common import Alphabet, String, Symbol
+from grammarlab.core.grammar import Rule, RuleSet
+from grammarlab.grammars.phrase_grammar import PhraseGrammar
+from grammarlab.transformations.trace import END_SECTION, GRAMMAR, NULL_TRACER, SECTION, Tracer
+
+
+def _rebuild(grammar: PhraseGrammar, rules: List[Rule], non_terminals: Alphabet = None) -> PhraseGrammar:
+    """Grammar of the same class with new rules, filters of grammar are kept."""
+    new_grammar = grammar.__class__(non_terminals or grammar.non_terminals, grammar.terminals, rules, grammar.start_symbol)
+    for func in grammar.filters:
+        new_grammar.set_filter(func)
+    for func in grammar.pre_filters:
+        new_grammar.set_pre_filter(func)
+    return new_grammar
+
+
+def _rhs_symbols(rule: Rule) -> List[Symbol]:
+    """Symbols of right side, strings of scattered context rule are concatenated."""
+    if isinstance(rule.rhs, String):
+        return rule.rhs.symbols
+    return [symbol for string in rule.rhs for symbol in string]
+
+
+def remove_duplicate_rules(grammar: PhraseGrammar, tracer: Tracer = NULL_TRACER) -> PhraseGrammar:
+    """Remove rules with the same sides as some previous rule.
+
+    Args:
+        grammar: Phrase grammar
+        tracer: Receiver of trace events.
+
+    Returns:
+        Grammar without duplicate rules, grammar itself if it has none.
+
+    """
+    tracer.emit(SECTION, "[bold]Removing duplicate rules", style="grey")
+    rules = RuleSet()
+    for rule in grammar.rules:
+        if not rules.add(rule):
+            tracer.emit("rule_removed", "Removing duplicate rule {rule}", rule=rule)
+    tracer.emit(END_SECTION)
+    if len(rules) == len(grammar.rules):
+        return grammar
+    return _rebuild(grammar, list(rules))
+
+
+def collapse_unit_cycles(grammar: PhraseGrammar, tracer: Tracer = NULL_TRACER) -> PhraseGrammar:
+    """Replace non-terminals that derive each other by unit rules with single non-terminal.
+
+    Only context-free grammars are collapsed. Start symbol represents its cycle,
+    otherwise the non-terminal with the lowest id does.
+
+    Args:
+        grammar: Phrase grammar
+        tracer: Receiver of trace events.
+
+    Returns:
+        Grammar without unit cycles, grammar itself if it has none or it is not context-free.
+
+    """
+    if not all(len(rule.lhs) == 1 and isinstance(rule.rhs, String) for rule in grammar.rules):
+        return grammar
+
+    tracer.emit(SECTION, "[bold]Collapsing unit cycles", style="grey")
+    pairs = grammar.analysis.unit_pairs
+    representatives: Dict[Symbol, Symbol] = {}
+    for first, second in pairs:
+        if first != second and (second, first) in pairs and first not in representatives:
+            cycle = [
+                symbol for symbol in grammar.non_terminals if (first, symbol) in pairs and (symbol, first) in pairs
+            ]
+            if grammar.start_symbol in cycle:
+                representative = grammar.start_symbol
+            else:
+                representative = min(cycle, key=lambda symbol: str(symbol.id))
+            for symbol in cycle:
+                representatives[symbol] = representative
+            if tracer.enabled:
+                tracer.emit("unit_cycle", "Symbols {cycle} replaced with {symbol}", cycle=set(cycle), symbol=representative)
+
+    if not representatives:
+        tracer.emit(END_SECTION)
+        return grammar
+
+    def rename(symbol):
+        return representatives.get(symbol, symbol)
+
+    rules = RuleSet()
+    for rule in grammar.rules:
+        lhs = rename(rule.lhs[0])
+        rhs = [rename(symbol) for symbol in rule.rhs]
+        if rhs == [lhs]:
+            tracer.emit("rule_removed", "Removing rule {rule} of unit cycle", rule=rule)
+            continue
+        rules.add(rule.__class__(String([lhs]), String(rhs)))
+    tracer.emit(END_SECTION)
+
+    merged = {symbol for symbol, representative in representatives.items() if symbol != representative}
+    non_terminals = Alphabet({symbol for symbol in grammar.non_terminals if symbol not in merged})
+    return _rebuild(grammar, list(rules), non_terminals)
+
+
+def remove_dead_rules(grammar: PhraseGrammar, tracer: Tracer = NULL_TRACER) -> PhraseGrammar:
+    """Remove rules that can never be used in derivation of sentence.
+
+    Rule is removed if it introduces non-generating symbol (see :meth:`PhraseGrammar.dead_symbols`)
+    or if some symbol of its left side never appears in sential form. Symbols that may appear are
+    found by fixpoint from start symbol, rule adds symbols of its right side once all symbols
+    of its left side may appear.
+
+    Args:
+        grammar: Phrase grammar
+        tracer: Receiver of trace events.
+
+    Returns:
+        Grammar without dead rules, grammar itself if it has none.
+
+    """
+    tracer.emit(SECTION, "[bold]Removing rules that can never fire", style="grey")
+    dead = grammar.dead_symbols()
+    rules = []
+    for rule in grammar.rules:
+        if dead and any(symbol in dead for symbol in _rhs_symbols(rule)):
+            tracer.emit("rule_removed", "Removing rule {rule} as it introduces nongenerating symbol", rule=rule)
+        else:
+            rules.append(rule)
+
+    appearing = {grammar.start_symbol}
+    waiting = list(rules)
+    changed = True
+    while changed:
+        changed = False
+        remaining = []
+        for rule in waiting:
+            if all(symbol in appearing for symbol in rule.lhs):
+                appearing.update(_rhs_symbols(rule))
+                changed = True
+            else:
+                remaining.append(rule)
+        waiting = remaining
+
+    for rule in waiting:
+        tracer.emit("rule_removed", "Removing rule {rule} as its left side never appears", rule=rule)
+    tracer.emit(END_SECTION)
+    if len(waiting) == 0 and len(rules) == len(grammar.rules):
+        return grammar
+    unused = {id(rule) for rule in waiting}
+    return _rebuild(grammar, [rule for rule in rules if id(rule) not in unused])
+
+
+def optimize(grammar: PhraseGrammar, tracer: Tracer = NULL_TRACER) -> PhraseGrammar:
+    """Reduce number of rules of grammar without changing its language.
+
+    Duplicate rules are removed, unit cycles of context-free grammars are collapsed
+    and rules that can never be used in derivation of sentence are removed.
+    Filters and pre-filters of grammar are kept.
+
+    Args:
+        grammar: Phrase grammar or scattered context grammar
+        tracer: Receiver of trace events.
+
+    Returns:
+        Optimized grammar, grammar itself if nothing could be removed.
+
+    Raises:
+        ValueError: If grammar is not phrase grammar.
+
+    """
+    if not isinstance(grammar, PhraseGrammar):
+        raise ValueError(f"Only phrase grammars can be optimized, not {grammar.__class__.__name__}!")
+    tracer.emit(SECTION, "[bold]Optimizing grammar", characters="#")
+    grammar = remove_duplicate_rules(grammar, tracer)
+    grammar = collapse_unit_cycles(grammar, tracer)
+    grammar = remove_dead_rules(grammar, tracer)
+    tracer.emit(GRAMMAR, "Optimized grammar", grammar=grammar)
+    return grammar
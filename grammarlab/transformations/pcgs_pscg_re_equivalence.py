@@ -1,11 +1,13 @@
 from grammarlab.transformations.accept_substring import (
     construct_grammar as accept_substring,
 )
+from grammarlab.transformations.cache import cached_transformation
 from grammarlab.transformations.derivation_sequence_in_scg import (
     construct_grammar as derivation_sequence_in_scg,
 )
 
 
+@cached_transformation("pcgs_pscg_re_equivalence")
 def construct_grammar(grammar):
     derivation_sequence_grammar = derivation_sequence_in_scg(grammar)
     return accept_substring(derivation_sequence_grammar, "#")
@@ -0,0 +1,109 @@
+"""Trace of transformation steps.
+
+Transformations report their steps as :class:`TraceEvent` objects passed to tracer.
+Events hold objects they describe (rules, symbols, grammars), objects are formatted
+only by tracer that renders them. Default tracer ignores all events, so transformations
+used as library don't pay for formatting.
+
+Example:
+    .. code-block:: python
+
+        from grammarlab.transformations.chomsky_normal_form import transform_to_chomsky
+        from grammarlab.transformations.trace import RichTracer
+
+        new_grammar = transform_to_chomsky(grammar, tracer=RichTracer())
+
+"""
+
+from collections import namedtuple
+from typing import List
+
+TraceEvent = namedtuple("TraceEvent", ["kind", "message", "data"])
+"""Step of transformation.
+
+Kind identifies type of step, message is template for human readable description
+with placeholders for objects in data.
+
+"""
+
+SECTION = "section"
+"""Event that starts section of transformation. Optional ``style`` and ``characters`` are used for ruler."""
+END_SECTION = "end_section"
+"""Event that ends section of transformation."""
+GRAMMAR = "grammar"
+"""Event with whole ``grammar``, message is its title."""
+
+
+class Tracer:
+    """Tracer that ignores all events.
+
+    Subclasses implement :meth:`emit`. Transformations check :attr:`enabled` before they
+    compute data needed only by trace.
+
+    """
+    enabled = False
+
+    def emit(self, kind: str, message: str = "", **data):
+        """Receive event of given kind, data are objects referenced by message."""
+
+
+NULL_TRACER = Tracer()
+"""Default tracer of transformations."""
+
+
+class RecordingTracer(Tracer):
+    """Tracer that stores events, so they can be inspected later.
+
+    Example:
+        >>> tracer = RecordingTracer()
+        >>> tracer.emit("rule_removed", "Removing rule {rule}", rule="S -> S")
+        >>> tracer.events
+        [TraceEvent(kind='rule_removed', message='Removing rule {rule}', data={'rule': 'S -> S'})]
+
+    """
+    enabled = True
+
+    def __init__(self):
+        self.events: List[TraceEvent] = []
+
+    def emit(self, kind: str, message: str = "", **data):
+        self.events.append(TraceEvent(kind, message, data))
+
+    def kinds(self) -> List[str]:
+        """Kinds of recorded events in order."""
+        return [event.kind for event in self.events]
+
+
+class RichTracer(Tracer):
+    """Tracer that renders events to console using rich.
+
+    Objects of events are exported by :class:`CliExport`.
+
+    Args:
+        console: Rich console used for output. If None, new console writing to stdout is created.
+
+    """
+    enabled = True
+
+    def __init__(self, console=None):
+        # rich is imported only when trace is rendered
+        from rich.console import Console  # pylint: disable=import-outside-toplevel
+
+        from grammarlab.export.cli import CliExport  # pylint: disable=import-outside-toplevel
+
+        self.console = console or Console()
+        self.cli_export = CliExport()
+
+    def emit(self, kind: str, message: str = "", **data):
+        if kind == END_SECTION:
+            self.console.rule(style="gray")
+        elif kind == GRAMMAR:
+            from rich.panel import Panel  # pylint: disable=import-outside-toplevel
+
+            self.console.print(Panel(self.cli_export.export(data["grammar"]), title=message))
+        elif kind == SECTION:
+            self.console.rule(message, **{key: data[key] for key in ("style", "characters") if key in data})
+        else:
+            self.console.print(message.format(**{
+                name: self.cli_export.export(value) for name, value in data.items()
+            }))
@@ -0,0 +1,53 @@
+import pytest
+
+from grammarlab.examples.cs_aaa import grammar as cs_aaa
+from grammarlab.grammars import RE
+from grammarlab.grammars.phrase_grammar import PhraseGrammar, canonical_order
+
+
+def same_number_of_a_and_b():
+    return RE(
+        {"S", "A", "B"},
+        {"a", "b"},
+        [("S", "ABS"), ("S", ""), ("AB", "BA"), ("BA", "AB"), ("A", "a"), ("B", "b")],
+        "S",
+    )
+
+
+def copy_with_erasing():
+    return RE(
+        {"S", "X", "Y", "E"},
+        {"a", "b"},
+        [("S", "XSY"), ("S", "E"), ("XE", "Ea"), ("EY", "bE"), ("E", ""), ("X", "a"), ("Y", "b")],
+        "S",
+    )
+
+
+def derived(grammar, depth):
+    return {
+        (str(configuration.sential_form), configuration.depth)
+        for configuration in grammar.derive(depth)
+    }
+
+
+@pytest.mark.parametrize(
+    "factory,depth,reduced",
+    [
+        # rewrites of cs_aaa never commute
+        (lambda: PhraseGrammar(cs_aaa.non_terminals, cs_aaa.terminals, cs_aaa.rules, cs_aaa.start_symbol), 30, False),
+        (same_number_of_a_and_b, 6, True),
+        (copy_with_erasing, 7, True),
+    ]
+)
+def test_canonical_order(factory, depth, reduced):
+    expected = derived(factory(), depth)
+    grammar = factory()
+    grammar.set_pre_filter(canonical_order)
+    assert derived(grammar, depth) == expected
+
+    all_configurations = sum(1 for _ in factory().derive(depth, only_sentences=False))
+    canonical_configurations = sum(1 for _ in grammar.derive(depth, only_sentences=False))
+    if reduced:
+        assert canonical_configurations < all_configurations
+    else:
+        assert canonical_configurations == all_configurations
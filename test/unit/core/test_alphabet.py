@@ -1,3 +1,5 @@
+import random
+
 from grammarlab.core.common import Alphabet, NonTerminal, String, Terminal
 
 
@@ -68,3 +70,53 @@ def test_copy():
     assert str1 == copied
     str1.replace(0, NonTerminal("D"))
     assert not str1 == copied
+
+
+def test_rewrite():
+    str1 = String([NonTerminal("A"), NonTerminal("B"), NonTerminal("C"), NonTerminal("D")])
+    rewritten = str1.rewrite([0, 2], [String([NonTerminal("X"), NonTerminal("Y")]), String([])])
+    assert rewritten == String([NonTerminal("X"), NonTerminal("Y"), NonTerminal("B"), NonTerminal("D")])
+    assert rewritten.index[NonTerminal("D")] == [3]
+    assert str1 == String([NonTerminal("A"), NonTerminal("B"), NonTerminal("C"), NonTerminal("D")])
+
+    rewritten = str1.rewrite([1], [String([NonTerminal("X")])], expand_symbols=2)
+    assert rewritten == String([NonTerminal("A"), NonTerminal("X"), NonTerminal("D")])
+
+
+def test_hash():
+    rng = random.Random(3)
+    alphabet = [NonTerminal(x) for x in "ABC"] + [Terminal(x) for x in "ab"]
+    for _ in range(300):
+        string = String([rng.choice(alphabet) for _ in range(rng.randint(1, 10))])
+        hash(string)
+        positions = sorted(rng.sample(range(len(string)), rng.randint(1, len(string))))
+        strings = [String([rng.choice(alphabet) for _ in range(rng.randint(0, 3))]) for _ in positions]
+        rewritten = string.rewrite(positions, strings)
+        assert hash(rewritten) == hash(String(rewritten.symbols))
+
+        copied = string.copy()
+        position = rng.randrange(len(string))
+        copied.expand(position, strings[0], expand_symbols=rng.randint(1, len(string) - position))
+        assert hash(copied) == hash(String(copied.symbols))
+        copied = string.copy()
+        copied.replace(position, rng.choice(alphabet))
+        assert hash(copied) == hash(String(copied.symbols))
+        assert copied == String(copied.symbols)
+
+    assert len({String([Terminal("a")]), String([Terminal("a")]), String([Terminal("b")])}) == 2
+
+
+def test_rewritten_hash_uses_prefix_hashes():
+    rng = random.Random(5)
+    alphabet = [NonTerminal(x) for x in "ABC"] + [Terminal(x) for x in "ab"]
+    string = String([rng.choice(alphabet) for _ in range(50)])
+    hash(string)
+    prefix_hashes = string.prefix_hashes()
+    assert prefix_hashes[-1] == hash(string)
+    for _ in range(100):
+        positions = sorted(rng.sample(range(0, 48, 2), rng.randint(1, 5)))
+        strings = [String([rng.choice(alphabet) for _ in range(rng.randint(0, 4))]) for _ in positions]
+        rewritten = string.rewrite(positions, strings, expand_symbols=2)
+        assert hash(rewritten) == hash(String(rewritten.symbols))
+        assert rewritten == String(rewritten.symbols)
+    assert string.prefix_hashes() is prefix_hashes
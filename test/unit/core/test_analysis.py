@@ -0,0 +1,104 @@
+import math
+import random
+
+import pytest
+
+from grammarlab.core.analysis import GrammarAnalysis, unit_pairs
+from grammarlab.core.common import NonTerminal, String, Terminal, epsilon
+from grammarlab.grammars import CF, ContextFreeRule, PhraseRule
+
+S, A, B, C = NonTerminal("S"), NonTerminal("A"), NonTerminal("B"), NonTerminal("C")
+a, b = Terminal("a"), Terminal("b")
+
+
+def grammar():
+    return CF({"S", "A", "B", "C"}, {"a", "b"}, [("S", "AB"), ("A", "aA"), ("A", ""), ("B", "b"), ("B", "A"), ("C", "C")], "S")
+
+
+def test_facts():
+    analysis = grammar().analysis
+    assert analysis.nullable == {A, B, S}
+    assert analysis.generating == {A, B, S}
+    assert analysis.reachable == {S, A, B, a, b}
+    assert analysis.unit_pairs == {(S, S), (A, A), (B, B), (C, C), (B, A)}
+    assert analysis.first == {S: {a, b}, A: {a}, B: {a, b}, C: set()}
+    assert analysis.follow[S] == {epsilon}
+    assert analysis.follow[A] == {a, b, epsilon}
+    assert analysis.minimum_yields == {S: 0, A: 0, B: 0, C: math.inf}
+
+
+def test_analysis_is_cached_and_invalidated():
+    g = grammar()
+    analysis = g.analysis
+    assert g.analysis is analysis
+    generating = analysis.generating
+    assert analysis.generating is generating
+
+    g.rules = g.rules[:-1]
+    assert g.analysis is not analysis
+    g.terminals = g.terminals
+    assert g.analysis is not analysis
+
+
+def test_add_rule_updates_facts():
+    g = grammar()
+    facts = ["nullable", "generating", "reachable", "unit_pairs", "first", "follow", "minimum_yields"]
+    for fact in facts:
+        getattr(g.analysis, fact)
+
+    for rule in [ContextFreeRule(String([C]), String([a])), ContextFreeRule(String([S]), String([b, C]))]:
+        g.add_rule(rule)
+        fresh = GrammarAnalysis(g)
+        for fact in facts:
+            assert getattr(g.analysis, fact) == getattr(fresh, fact), fact
+
+
+def test_add_rule_before_facts_are_computed():
+    g = grammar()
+    analysis = g.analysis
+    g.add_rule(ContextFreeRule(String([C]), String([a])))
+    fresh = GrammarAnalysis(g)
+    assert analysis.productions == fresh.productions
+    assert len(analysis.productions) == len(g.rules)
+    assert analysis.generating == fresh.generating == {S, A, B, C}
+
+
+def test_add_rule_propagates_new_productions():
+    rng = random.Random(11)
+    non_terminals = [NonTerminal(symbol) for symbol in "SABCDE"]
+    facts = ["nullable", "generating", "reachable", "unit_pairs", "first", "follow", "minimum_yields"]
+
+    def random_rule():
+        rhs = [rng.choice(non_terminals + [a, b]) for _ in range(rng.choice([0, 1, 1, 2, 3]))]
+        return ContextFreeRule(String([rng.choice(non_terminals)]), String(rhs))
+
+    for _ in range(50):
+        g = CF({"S", "A", "B", "C", "D", "E"}, {"a", "b"}, [], "S")
+        for _ in range(3):
+            g.add_rule(random_rule())
+        for fact in facts:
+            getattr(g.analysis, fact)
+        for _ in range(8):
+            g.add_rule(random_rule())
+            fresh = GrammarAnalysis(g)
+            for fact in facts:
+                assert getattr(g.analysis, fact) == getattr(fresh, fact), fact
+
+
+def test_non_context_free_rule():
+    g = grammar()
+    assert g.analysis.generating
+    g.add_rule(PhraseRule(String([A, B]), String([b])))
+    assert not g.analysis.context_free
+    with pytest.raises(ValueError):
+        g.analysis.nullable
+
+
+def test_unit_pairs_closure():
+    D = NonTerminal("D")
+    productions = [(A, [B]), (B, [C]), (C, [A]), (C, [D, a]), (S, [A])]
+    pairs = unit_pairs(productions, {S, A, B, C, D})
+    assert pairs == {(S, S), (A, A), (B, B), (C, C), (D, D)} | {
+        (x, y) for x in (S, A, B, C) for y in (A, B, C)
+    }
+    assert unit_pairs(productions[1:], {S, A, B, C, D}, unit_pairs(productions[:1], {S, A, B, C, D})) == pairs
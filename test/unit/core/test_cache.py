@@ -0,0 +1,41 @@
+from grammarlab.core.cache import CacheInfo, LRUCache, SuccessorCache
+from grammarlab.grammars import CF
+
+
+def test_lru_eviction():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_lru_statistics():
+    cache = LRUCache(maxsize=2)
+    assert cache.hit_rate == 0.0
+    cache.put("a", 1)
+    cache.get("a")
+    cache.get("b")
+    cache.get("a")
+    assert cache.info() == CacheInfo(hits=2, misses=1, maxsize=2, currsize=1)
+    assert cache.hit_rate == 2 / 3
+    cache.clear()
+    assert cache.info() == CacheInfo(hits=0, misses=0, maxsize=2, currsize=0)
+
+
+def test_successor_cache_replays_successors():
+    grammar = CF({"S"}, {"a"}, [("S", "a"), ("S", "aS")], "S")
+    cache = SuccessorCache(maxsize=10)
+    axiom = grammar.axiom
+    derived = cache.successors(axiom.key, axiom, grammar.direct_derive)
+
+    other = grammar.configuration_class(axiom.data)
+    replayed = cache.successors(other.key, other, grammar.direct_derive)
+    assert cache.info() == CacheInfo(hits=1, misses=1, maxsize=10, currsize=1)
+    assert [c.sential_form for c in replayed] == [c.sential_form for c in derived]
+    assert [c.used_rule for c in replayed] == [c.used_rule for c in derived]
+    assert all(c.parent is other and c.depth == 1 for c in replayed)
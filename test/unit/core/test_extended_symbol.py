@@ -1,3 +1,5 @@
+import pickle
+
 from grammarlab.core.common import SymbolType, Terminal
 from grammarlab.core.extended_symbol import ExtendedSymbol
 
@@ -38,3 +40,33 @@ def test_variants():
     assert s1.variant1.variant2.id == "S_2"
     assert s1.variant1.type == SymbolType.NON_TERMINAL
     assert s1.variant1.base == s1
+
+
+def test_attributes():
+    s1 = Symbol1(Terminal("A"))
+    variant = s1.variant1
+    attributes = Symbol1.attributes
+    assert Symbol2.attributes is not attributes
+
+    codes = list(attributes.encode([s1, variant, Terminal("A")]))
+    assert codes[0] == s1.code and codes[1] == variant.code and codes[2] == 0
+    assert attributes.variant[variant.code] == attributes.variant_code("variant1")
+    assert attributes.variant[s1.code] == attributes.variant_code(None) == 0
+    assert attributes.base[s1.code] == attributes.base[variant.code] == attributes.base_code("A")
+    assert attributes.type[s1.code] == 0 and attributes.type[variant.code] == 1
+    assert attributes.variant[0] == attributes.base[0] == attributes.type[0] == -1
+    assert attributes.first(attributes.encode([s1, Terminal("A"), variant]), variant=attributes.variant_code("variant1")) == 2
+    assert attributes.first(attributes.encode([Terminal("A"), s1]), base=attributes.base_code("A")) == 1
+    assert attributes.first(attributes.encode([s1]), variant=attributes.variant_code("variant1")) is None
+
+    # variant of cached symbol can be changed
+    s1.variant = "variant2"
+    assert attributes.variant[s1.code] == attributes.variant_code("variant2")
+    s1.variant = None
+    assert attributes.variant[s1.code] == 0
+
+
+def test_pickle():
+    symbol = Symbol1(Terminal("S")).variant1
+    assert pickle.loads(pickle.dumps(symbol)) is symbol
+    assert pickle.loads(pickle.dumps(Terminal("S"))) is Terminal("S")
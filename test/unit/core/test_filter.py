@@ -0,0 +1,191 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from grammarlab.core.filter import (
+    FilterPipeline,
+    IncrementalFilter,
+    count_change,
+    first_position,
+    last_position,
+    update_first,
+    update_last,
+)
+from grammarlab.core.grammar import Region
+from grammarlab.grammars import CF
+
+
+def test_pipeline_statistics():
+    def positive(number):
+        return number > 0
+
+    def even(number):
+        return number % 2 == 0
+
+    pipeline = FilterPipeline()
+    pipeline.append(positive)
+    pipeline.append(even)
+    assert [number for number in range(-3, 4) if pipeline(number)] == [2]
+    statistics = pipeline.statistics()
+    assert [(s.name, s.calls, s.rejections) for s in statistics] == [("positive", 7, 4), ("even", 3, 2)]
+    assert list(pipeline) == [positive, even]
+    pipeline.reset_statistics()
+    assert [(s.calls, s.rejections, s.time) for s in pipeline.statistics()] == [(0, 0, 0.0), (0, 0, 0.0)]
+
+
+def test_pipeline_reorder():
+    calls = []
+
+    def accept_all(number):
+        calls.append("accept_all")
+        return sum(range(100)) > 0
+
+    def reject_odd(number):
+        calls.append("reject_odd")
+        return number % 2 == 0
+
+    pipeline = FilterPipeline(reorder_interval=10)
+    pipeline.append(accept_all)
+    pipeline.append(reject_odd)
+    results = [pipeline(number) for number in range(20)]
+    assert results == [number % 2 == 0 for number in range(20)]
+    # selective filter runs first after reordering
+    calls.clear()
+    pipeline(1)
+    assert calls == ["reject_odd"]
+
+
+def test_pipeline_does_not_reorder_by_default():
+    calls = []
+
+    def accept_all(number):
+        calls.append("accept_all")
+        return True
+
+    def reject_odd(number):
+        calls.append("reject_odd")
+        return number % 2 == 0
+
+    pipeline = FilterPipeline()
+    pipeline.append(accept_all)
+    pipeline.append(reject_odd)
+    for number in range(2000):
+        pipeline(number)
+    calls.clear()
+    pipeline(1)
+    assert calls == ["accept_all", "reject_odd"]
+
+
+def test_pipeline_threads():
+    def odd(number):
+        return number % 2 == 1
+
+    def small(number):
+        return number < 50
+
+    pipeline = FilterPipeline(reorder_interval=3)
+    pipeline.append(odd)
+    pipeline.append(small)
+    numbers = list(range(100)) * 20
+    with ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(pipeline, numbers))
+    assert results == [odd(number) and small(number) for number in numbers]
+    assert sum(statistics.rejections for statistics in pipeline.statistics()) == results.count(False)
+    assert max(statistics.calls for statistics in pipeline.statistics()) <= len(numbers)
+
+
+def test_grammar_filter_statistics():
+    grammar = CF({"S"}, {"a"}, [("S", "a"), ("S", "aS")], "S")
+
+    def short(configuration):
+        return len(configuration.sential_form) < 3
+
+    grammar.set_filter(short)
+    assert [str(c.sential_form) for c in grammar.derive(5)] == ["a", "a a"]
+    statistics, = grammar.filter_statistics()
+    assert statistics.name == "short"
+    assert (statistics.calls, statistics.rejections) == (4, 1)
+
+
+def test_grammar_filter_reordering():
+    def accept_all(configuration):
+        return sum(range(500)) > 0
+
+    def short(configuration):
+        return len(configuration.sential_form) < 10
+
+    grammar = CF({"S"}, {"a"}, [("S", "a"), ("S", "aS"), ("S", "aaS")], "S")
+    grammar.set_filter(accept_all)
+    grammar.set_filter(short)
+    expected = [str(c.sential_form) for c in grammar.derive(12, only_sentences=False)]
+    calls, short_calls = [statistics.calls for statistics in grammar.filter_statistics()]
+    assert calls == short_calls
+
+    grammar.filters.reset_statistics()
+    grammar.set_filter_reordering(20)
+    assert [str(c.sential_form) for c in grammar.derive(12, only_sentences=False)] == expected
+    accept_all_statistics, short_statistics = grammar.filter_statistics()
+    # selective filter runs first after reordering, accept_all is not evaluated for rejected configurations
+    assert accept_all_statistics.calls < short_statistics.calls == calls
+
+
+def random_rewrite(rng, symbols):
+    """Rewrite random disjoint positions of symbols, return new symbols and rewritten regions."""
+    positions = sorted(rng.sample(range(len(symbols)), rng.randint(1, min(3, len(symbols)))))
+    new_symbols = []
+    regions = []
+    start = 0
+    for position in positions:
+        new_symbols.extend(symbols[start:position])
+        rhs = [rng.randint(0, 5) for _ in range(rng.randint(0, 3))]
+        regions.append(Region(position, position + 1, len(new_symbols), len(new_symbols) + len(rhs)))
+        new_symbols.extend(rhs)
+        start = position + 1
+    new_symbols.extend(symbols[start:])
+    return new_symbols, regions
+
+
+def test_update_positions():
+    rng = random.Random(7)
+
+    def is_zero(symbol):
+        return symbol == 0
+
+    for _ in range(500):
+        symbols = [rng.randint(0, 5) for _ in range(rng.randint(1, 12))]
+        new_symbols, regions = random_rewrite(rng, symbols)
+        first = update_first(first_position(is_zero, symbols), is_zero, new_symbols, regions)
+        assert first == first_position(is_zero, new_symbols)
+        last = update_last(last_position(is_zero, symbols), is_zero, new_symbols, regions)
+        assert last == last_position(is_zero, new_symbols)
+        change = count_change(is_zero, symbols, new_symbols, regions)
+        assert change == new_symbols.count(0) - symbols.count(0)
+
+
+class AtMostTwoA(IncrementalFilter):
+    min_length = 0
+
+    def initialize(self, sential_form):
+        return sum(1 for symbol in sential_form if symbol.id == "a")
+
+    def update(self, state, parent_form, sential_form, regions):
+        self.updates += 1
+        return state + count_change(lambda symbol: symbol.id == "a", parent_form.symbols, sential_form.symbols, regions)
+
+    def accept(self, state):
+        return state <= 2
+
+
+def test_incremental_filter():
+    def at_most_two_a(configuration):
+        return sum(1 for symbol in configuration.sential_form if symbol.id == "a") <= 2
+
+    expected = CF({"S", "A"}, {"a", "b"}, [("S", "aSA"), ("S", "b"), ("A", "a"), ("A", "b")], "S")
+    expected.set_filter(at_most_two_a)
+    grammar = CF({"S", "A"}, {"a", "b"}, [("S", "aSA"), ("S", "b"), ("A", "a"), ("A", "b")], "S")
+    incremental = AtMostTwoA("at_most_two_a")
+    incremental.updates = 0
+    grammar.set_filter(incremental)
+    derived = [str(configuration.sential_form) for configuration in grammar.derive(8)]
+    assert derived == [str(configuration.sential_form) for configuration in expected.derive(8)]
+    assert incremental.updates > 0
+    assert grammar.filter_statistics()[0].name == "at_most_two_a"
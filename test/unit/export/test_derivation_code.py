@@ -0,0 +1,91 @@
+import pytest
+
+from grammarlab.export.derivation_code import DerivationCodeExport, compile_grammar
+from grammarlab.core.common import NonTerminal, String, Terminal
+from grammarlab.grammars import CF, CS, NPC, SCG, ContextFreeRule
+
+
+def cs_grammar():
+    return CS(
+        {"S", "-", "A", "L", "R", "F"},
+        {"a", "_"},
+        [
+            ("S", "a-L-a"), ("L-", "F_"), ("AL", "LA"), ("RA", "AR"),
+            ("-L", "a-AR"), ("R-", "L-a"), ("AF", "Fa"), ("-F", "_a"),
+        ],
+        "S",
+    )
+
+
+def cf_grammar():
+    return CF({"S"}, {"(", ")"}, [("S", "(S)"), ("S", "SS"), ("S", "()"), ("S", "")], "S")
+
+
+def scg_grammar():
+    return SCG(
+        {"S", "A", "B"},
+        {"a", "b"},
+        [(["S"], ["AAB"]), (["A", "A", "B"], ["aA", "A", "Bb"]), (["A", "A", "B"], ["a", "", "b"])],
+        "S",
+    )
+
+
+def pc_grammar():
+    C_1 = CF({"A", "2"}, {"a", "-"}, [("A", "-2"), ("A", "-")], "A")
+    C_2 = CF({"A"}, {"a"}, [("A", "aA")], "A")
+    return NPC(["1", "2"], C_1, C_2)
+
+
+def derive(grammar, depth):
+    return [
+        (str(configuration.sential_form), configuration.depth, configuration.affected)
+        for configuration in grammar.derive(depth, only_sentences=False)
+    ]
+
+
+@pytest.mark.parametrize(
+    "factory,depth",
+    [
+        (cs_grammar, 20),
+        (cf_grammar, 6),
+        (scg_grammar, 6),
+        (pc_grammar, 8),
+    ]
+)
+def test_compiled_derivation(factory, depth):
+    expected = derive(factory(), depth)
+    assert expected
+    assert derive(compile_grammar(factory()), depth) == expected
+
+
+def test_export_scattered_context_rule():
+    code = DerivationCodeExport().export(scg_grammar())
+    assert "def direct_derive(configuration):" in code.content
+    assert "bisect_right(positions_2, position_1)" in code.content
+    assert "leftmost = None" in code.content
+
+
+@pytest.mark.parametrize("factory", [cs_grammar, cf_grammar, scg_grammar])
+def test_compiled_pre_filter(factory):
+    def even_position(configuration, rule, match):
+        return (match[0] if isinstance(match, list) else match) % 2 == 0
+
+    expected = factory()
+    expected.set_pre_filter(even_position)
+    compiled = compile_grammar(factory())
+    compiled.set_pre_filter(even_position)
+    assert derive(compiled, 6) == derive(expected, 6)
+    assert derive(compiled, 6) != derive(factory(), 6)
+
+
+def test_compiled_grammar_rules_change():
+    grammar = compile_grammar(cf_grammar())
+    assert "(" not in {sential_form for sential_form, _, _ in derive(grammar, 1)}
+    grammar.add_rule(ContextFreeRule(String([NonTerminal("S")]), String([Terminal("(")])))
+    assert "(" in {sential_form for sential_form, _, _ in derive(grammar, 1)}
+    expected = CF({"S"}, {"(", ")"}, [("S", "(S)"), ("S", "SS"), ("S", "()"), ("S", ""), ("S", "(")], "S")
+    assert derive(grammar, 3) == derive(expected, 3)
+
+    compile_grammar(grammar)
+    grammar.rules = grammar.rules[:1]
+    assert derive(grammar, 3) == derive(CF({"S"}, {"(", ")"}, [("S", "(S)")], "S"), 3)
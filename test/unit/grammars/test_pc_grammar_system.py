@@ -1,3 +1,5 @@
+import gc
+
 import pytest
 
 from grammarlab.core.common import NonTerminal
@@ -67,3 +69,213 @@ def test_c_step():
     configuration = PCConfiguration([C(S([NonTerminal("2"), NonTerminal("2")])), C(S([NonTerminal("1"), NonTerminal("1")]))])
     result = list(pcgs.c_step(configuration))
     assert len(result) == 0
+
+
+def test_c_step_multiple_communication_symbols():
+    components = [ScatteredContextGrammar(None, None, None, NonTerminal(f"S{i}")) for i in range(1, 4)]
+    pcgs = PCGrammarSystem(
+        comumunication_symbols=[NonTerminal("1"), NonTerminal("2"), NonTerminal("3")],
+        components=components,
+        returning=False,
+    )
+    configuration = PCConfiguration([
+        C(S([NonTerminal("3"), T("x"), NonTerminal("2")])),
+        C(S([NonTerminal("B"), NonTerminal("B")])),
+        C(S([])),
+    ])
+    result = list(pcgs.c_step(configuration))
+    assert len(result) == 1
+    assert result[0][0] == C(S([T("x"), NonTerminal("B"), NonTerminal("B")]))
+    assert result[0][0].affected == [0, 2]
+    assert result[0][1] == C(S([NonTerminal("B"), NonTerminal("B")]))
+
+
+def test_g_step_derives_components_once():
+    components = [
+        ScatteredContextGrammar(
+            [NonTerminal(x)], [T(x.lower())], [ScatteredContextRule([NonTerminal(x)], [S([T(x.lower())])])], NonTerminal(x)
+        )
+        for x in "ABC"
+    ]
+    calls = []
+    for component in components:
+        def direct_derive(configuration, derive=component.direct_derive):
+            calls.append(configuration)
+            return derive(configuration)
+        component.direct_derive = direct_derive
+
+    pcgs = PCGrammarSystem(comumunication_symbols=[], components=components)
+    configuration = PCConfiguration([C(S([NonTerminal(x)] * 3)) for x in "ABC"])
+    result = list(pcgs.g_step(configuration))
+    assert len(result) == 27
+    assert len(calls) == 3
+
+
+def test_successor_cache():
+    grammar = ScatteredContextGrammar(
+        [NonTerminal("A")], [T("a")], [ScatteredContextRule([NonTerminal("A")], [S([T("a")])])], NonTerminal("A")
+    )
+    pcgs = PCGrammarSystem(comumunication_symbols=[], components=[grammar], successor_cache_size=8)
+    configuration = PCConfiguration([C(S([NonTerminal("A"), NonTerminal("A")]))])
+    first = list(pcgs.g_step(configuration))
+    second = list(pcgs.g_step(configuration))
+    assert first == second
+    assert second[0][0].parent is configuration[0]
+    assert second[0][0].depth == configuration[0].depth + 1
+    info = pcgs.successor_cache_info()[0]
+    assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+
+    uncached = PCGrammarSystem(comumunication_symbols=[], components=[grammar], successor_cache_size=None)
+    assert list(uncached.g_step(configuration)) == first
+    assert uncached.successor_cache_info() == [None]
+
+
+def test_successor_cache_follows_component_changes():
+    grammar = ScatteredContextGrammar(
+        [NonTerminal("A")], [T("a")], [ScatteredContextRule([NonTerminal("A")], [S([T("a")])])], NonTerminal("A")
+    )
+    pcgs = PCGrammarSystem(comumunication_symbols=[], components=[grammar], successor_cache_size=8)
+    assert PCGrammarSystem(comumunication_symbols=[], components=[grammar]).successor_cache_info() == [None]
+    configuration = PCConfiguration([C(S([NonTerminal("A")]))])
+    assert len(list(pcgs.g_step(configuration))) == 1
+
+    grammar.add_rule(ScatteredContextRule([NonTerminal("A")], [S([T("a"), T("a")])]))
+    assert len(list(pcgs.g_step(configuration))) == 2
+    grammar.set_pre_filter(lambda configuration, rule, match: len(rule.rhs[0]) == 1)
+    assert len(list(pcgs.g_step(configuration))) == 1
+
+
+def test_successor_memo_with_component_pre_filters():
+    from grammarlab.grammars import CS
+    from grammarlab.grammars.phrase_grammar import canonical_order
+
+    component = CS({"S", "A", "B"}, {"a", "b"}, [("S", "AB"), ("S", "Ab"), ("A", "a"), ("B", "b")], "S")
+    component.set_pre_filter(canonical_order)
+    pcgs = PCGrammarSystem([NonTerminal("1")], [component])
+    # "A b" is derived with different affected parts, canonical order rewrites only one of them to "a b"
+    expected = [(str(c.sential_form), c.depth) for c in pcgs.derive(4, only_sentences=False)]
+    assert expected.count(("a b", 2)) == 1
+    memoised = [(str(c.sential_form), c.depth) for c in pcgs.derive(4, only_sentences=False, successor_memo=100)]
+    assert memoised == expected
+
+
+def test_configurations_share_unchanged_components():
+    grammar = ScatteredContextGrammar(
+        [NonTerminal("A")], [T("a")], [ScatteredContextRule([NonTerminal("A")], [S([T("a")])])], NonTerminal("A")
+    )
+    pcgs = PCGrammarSystem(comumunication_symbols=[NonTerminal("1"), NonTerminal("2"), NonTerminal("3")],
+                           components=[grammar] * 3)
+    configuration = PCConfiguration([
+        C(S([NonTerminal("A"), NonTerminal("A")])), C(S([T("a")])), C(S([NonTerminal("A")]))
+    ])
+    result = list(pcgs.g_step(configuration))
+    assert len(result) == 2
+    assert result[0][1] is configuration[1]
+    assert result[0][2] is result[1][2]
+
+    configuration = PCConfiguration([C(S([NonTerminal("2")])), C(S([T("a")])), C(S([NonTerminal("A")]))])
+    result = next(pcgs.c_step(configuration))
+    assert result[0].sential_form == S([T("a")])
+    assert result[2].sential_form is configuration[2].sential_form
+
+
+def test_communication():
+    components = [ScatteredContextGrammar(None, None, None, NonTerminal(f"S{i}")) for i in range(1, 3)]
+    pcgs = PCGrammarSystem(
+        comumunication_symbols=[NonTerminal("1"), NonTerminal("2")],
+        components=components,
+    )
+    configuration = PCConfiguration([C(S([NonTerminal("A"), T("a")])), C(S([NonTerminal("B")]))])
+    assert not pcgs.communication(configuration)
+
+    # lookup in index inserts symbol without positions
+    configuration[1].sential_form.index[NonTerminal("1")]
+    assert not pcgs.communication(configuration)
+
+    configuration = PCConfiguration([C(S([NonTerminal("A"), T("a")])), C(S([T("b"), NonTerminal("1")]))])
+    assert pcgs.communication(configuration)
+
+    pcgs.communication_symbols = [NonTerminal("A")]
+    assert pcgs.communication(configuration)
+    assert not pcgs.communication(PCConfiguration([C(S([NonTerminal("1")]))]))
+
+
+def test_g_step_workers():
+    from grammarlab.examples.pc_power_of_two import grammar
+
+    with PCGrammarSystem(grammar.communication_symbols, grammar.components, workers=2) as threaded:
+        assert [str(c) for c in threaded.derive(6)] == [str(c) for c in grammar.derive(6)]
+        executor = threaded.executor
+        assert executor is not None
+    assert threaded._executor is None
+    assert executor._shutdown
+    assert PCGrammarSystem([], []).executor is None
+
+
+def test_executor_shut_down_when_collected():
+    from grammarlab.examples.pc_power_of_two import grammar
+
+    threaded = PCGrammarSystem(grammar.communication_symbols, grammar.components, workers=2)
+    executor = threaded.executor
+    del threaded
+    gc.collect()
+    assert executor._shutdown
+
+
+def test_configuration_hash():
+    first = PCConfiguration([C(S([NonTerminal("A"), T("a")])), C(S([T("b")]))])
+    second = PCConfiguration([C(S([NonTerminal("A"), T("a")])), C(S([T("b")]))])
+    other = PCConfiguration([C(S([NonTerminal("A"), T("a")])), C(S([T("a")]))])
+    assert hash(first) == hash(second)
+    assert len({first, second, other}) == 2
+    assert len({first[0], second[0]}) == 1
+
+
+def test_dead_symbols():
+    def system(returning, query_master):
+        master = ScatteredContextGrammar(
+            [NonTerminal("A"), NonTerminal("D"), NonTerminal("E"), NonTerminal("2")],
+            [T("a")],
+            [
+                ScatteredContextRule([NonTerminal("A")], [S([T("a"), NonTerminal("2")])]),
+                ScatteredContextRule([NonTerminal("A")], [S([NonTerminal("D")])]),
+                ScatteredContextRule([NonTerminal("D")], [S([NonTerminal("E")])]),
+            ],
+            NonTerminal("A")
+        )
+        component = ScatteredContextGrammar(
+            [NonTerminal("B"), NonTerminal("1")],
+            [T("b")],
+            [ScatteredContextRule([NonTerminal("B")], [S([NonTerminal("1") if query_master else T("b")])])],
+            NonTerminal("B")
+        )
+        return PCGrammarSystem(
+            comumunication_symbols=[NonTerminal("1"), NonTerminal("2")],
+            components=[master, component],
+            returning=returning,
+        )
+
+    assert system(returning=True, query_master=False).dead_symbols() == {NonTerminal("D"), NonTerminal("E")}
+    assert system(returning=False, query_master=True).dead_symbols() == {NonTerminal("D"), NonTerminal("E")}
+    assert system(returning=True, query_master=True).dead_symbols() == set()
+
+    derived = list(system(returning=True, query_master=False).derive(3, only_sentences=False))
+    assert derived
+    assert all(NonTerminal("D") not in configuration.sential_form for configuration in derived)
+
+
+def test_fingerprint():
+    def component(symbol, terminal):
+        return ScatteredContextGrammar(
+            [NonTerminal(symbol)], [T(terminal)], [ScatteredContextRule([NonTerminal(symbol)], [S([T(terminal)])])],
+            NonTerminal(symbol)
+        )
+
+    symbols = [NonTerminal("1"), NonTerminal("2")]
+    system = PCGrammarSystem(comumunication_symbols=symbols, components=[component("A", "a"), component("B", "b")])
+    fingerprint = system.fingerprint
+    assert system.fingerprint == fingerprint
+    assert PCGrammarSystem(symbols, [component("B", "b"), component("A", "a")]).fingerprint != fingerprint
+
+    system.components[1].add_rule(ScatteredContextRule([NonTerminal("B")], [S([T("b"), T("b")])]))
+    assert system.fingerprint != fingerprint
@@ -1,12 +1,20 @@
+import math
+import os
+import subprocess
+import sys
+
 import pytest
 
 from grammarlab.core.common import Alphabet as A
 from grammarlab.core.common import NonTerminal
 from grammarlab.core.common import String as S
 from grammarlab.core.common import Terminal as T
+from grammarlab.core.grammar import DerivationStrategy
+from grammarlab.grammars import CF
 from grammarlab.grammars.phrase_grammar import PhraseConfiguration as C
 from grammarlab.grammars.phrase_grammar import PhraseGrammar as Grammar
 from grammarlab.grammars.phrase_grammar import PhraseRule as Rule
+from grammarlab.grammars.phrase_grammar import canonical_order
 
 
 @pytest.mark.parametrize(
@@ -77,3 +85,140 @@ def test_derive():
     print(result)
     print([C(S([T("b"), T("b"), T("x")])), C(S([T("b"), T("b"), T("x")]))])
     assert result == [C(S([T("b"), T("b"), T("x")])), C(S([T("b"), T("b"), T("x")]))]
+
+
+def test_pre_filter():
+    non_terminals = A({NonTerminal("S"), NonTerminal("A"), NonTerminal("X"), NonTerminal("B")})
+    terminals = A({T("a"), T("b"), T("x")})
+    rules = [
+        Rule(S([NonTerminal("S")]), S([NonTerminal("A"), NonTerminal("A"), NonTerminal("X"), NonTerminal("A")])),
+        Rule(S([NonTerminal("A")]), S([T("b"), T("b")])),
+        Rule(S([NonTerminal("A"), NonTerminal("X"), NonTerminal("A")]), S([T("x")])),
+    ]
+    grammar = Grammar(non_terminals, terminals, rules, NonTerminal("S"))
+    calls = []
+
+    def no_x(configuration, rule, match):
+        calls.append((configuration, rule, match))
+        return rule is not rules[2]
+
+    grammar.set_pre_filter(no_x)
+    assert list(grammar.derive(100)) == []
+    assert (grammar.axiom, rules[0], 0) in calls
+
+
+def test_derive_transposition_table():
+    def grammar():
+        non_terminals = A({NonTerminal("S"), NonTerminal("A"), NonTerminal("B"), NonTerminal("C")})
+        terminals = A({T("a"), T("b"), T("c")})
+        rules = [
+            Rule(S([NonTerminal("S")]), S([NonTerminal("A"), NonTerminal("B"), NonTerminal("C")])),
+            Rule(S([NonTerminal("A")]), S([T("a")])),
+            Rule(S([NonTerminal("B")]), S([T("b")])),
+            Rule(S([NonTerminal("C")]), S([T("c")])),
+        ]
+        return Grammar(non_terminals, terminals, rules, NonTerminal("S"))
+
+    full = [str(c.sential_form) for c in grammar().derive(4, only_sentences=False)]
+    pruned = [str(c.sential_form) for c in grammar().derive(4, only_sentences=False, transposition_table=100)]
+    assert set(pruned) == set(full)
+    assert full.count("a b c") == 6
+    assert pruned.count("a b c") == 3
+
+    ids = [str(c.sential_form) for c in grammar().derive(strategy=DerivationStrategy.IDS, depth=5, transposition_table=100)]
+    assert ids == ["a b c"] * 3
+
+
+def test_derive_successor_memo():
+    grammar = Grammar(
+        A({NonTerminal("S")}),
+        A({T("a"), T("b")}),
+        [Rule(S([NonTerminal("S")]), S([T("a"), NonTerminal("S")])), Rule(S([NonTerminal("S")]), S([T("b")]))],
+        NonTerminal("S"),
+    )
+    for strategy in DerivationStrategy:
+        full = [(str(c.sential_form), c.depth) for c in grammar.derive(5, strategy=strategy)]
+        memo = [(str(c.sential_form), c.depth) for c in grammar.derive(5, strategy=strategy, successor_memo=100)]
+        assert memo == full
+
+    parsed = next(grammar.parse(grammar.configuration_class(S([T("a"), T("a"), T("b")]))))
+    assert [c.used_rule for c in parsed.derivation_sequence()[1:]] == grammar.rules[:1] * 2 + grammar.rules[1:]
+
+
+def test_minimum_yields():
+    grammar = CF({"S", "A", "B"}, {"a", "b"}, [("S", "AB"), ("S", "aSb"), ("S", "aAb"), ("A", "aA"), ("A", ""), ("B", "bB")], "S")
+    yields = grammar.minimum_yields()
+    assert yields[NonTerminal("S")] == 2
+    assert yields[NonTerminal("A")] == 0
+    assert yields[NonTerminal("B")] == math.inf
+
+    contracting = Grammar(
+        A({NonTerminal("S"), NonTerminal("A")}),
+        A({T("a")}),
+        [Rule(S([NonTerminal("S"), NonTerminal("A")]), S([T("a")]))],
+        NonTerminal("S"),
+    )
+    assert contracting.minimum_yields() is None
+
+
+def test_derive_max_length():
+    grammar = CF({"S"}, {"a", "b"}, [("S", "aSb"), ("S", "ab")], "S")
+    full = [str(c.sential_form) for c in grammar.derive(6, only_sentences=False)]
+    bounded = [str(c.sential_form) for c in grammar.derive(6, only_sentences=False, max_length=5)]
+    assert bounded == [form for form in full if len(form.replace(" ", "").replace("S", "ab")) <= 5]
+
+    parsed = next(grammar.parse(grammar.configuration_class(S([T("a"), T("a"), T("b"), T("b")]))))
+    assert parsed.depth == 2
+
+
+def test_derive_max_length_terminals_in_non_terminal_alphabet():
+    grammar = Grammar(
+        A({NonTerminal("S"), T("a")}),
+        A({T("a"), T("b")}),
+        [Rule(S([NonTerminal("S")]), S([T("a"), NonTerminal("S")])), Rule(S([NonTerminal("S")]), S([T("b")]))],
+        NonTerminal("S"),
+    )
+    assert grammar.minimum_yields()[NonTerminal("S")] == 1
+    assert T("a") not in grammar.minimum_yields()
+    bounded = [str(c.sential_form) for c in grammar.derive(6, max_length=3, prune_dead_symbols=False)]
+    assert bounded == ["a a b", "a b", "b"]
+
+
+def test_derive_dead_symbols():
+    grammar = CF({"S", "A", "B"}, {"a", "b"}, [("S", "aS"), ("S", "AB"), ("S", "a"), ("A", "a"), ("B", "bB")], "S")
+    assert grammar.dead_symbols() == {NonTerminal("B")}
+
+    full = [str(c.sential_form) for c in grammar.derive(4, only_sentences=False, prune_dead_symbols=False)]
+    pruned = [str(c.sential_form) for c in grammar.derive(4, only_sentences=False)]
+    assert pruned == [form for form in full if "B" not in form]
+    assert [form for form in full if "B" not in form] != full
+
+
+def test_fingerprint():
+    rules = [("S", "aSb"), ("S", "ab"), ("S", "")]
+    grammar = CF({"S"}, {"a", "b"}, rules, "S")
+    fingerprint = grammar.fingerprint
+    assert len(fingerprint) == 64
+    assert CF({"S"}, {"a", "b"}, rules[::-1], "S").fingerprint == fingerprint
+    assert CF({"S"}, {"a", "b"}, rules[:2], "S").fingerprint != fingerprint
+
+    grammar.add_rule(Rule(S([NonTerminal("S")]), S([T("a")])))
+    assert grammar.fingerprint != fingerprint
+    fingerprint = grammar.fingerprint
+    grammar.set_pre_filter(canonical_order)
+    assert grammar.fingerprint != fingerprint
+
+
+def test_fingerprint_is_stable_across_processes():
+    code = (
+        "from grammarlab.grammars import CF;"
+        "print(CF({'S', 'A'}, {'a', 'b'}, [('S', 'aA'), ('A', 'b'), ('S', 'ab')], 'S').fingerprint)"
+    )
+    fingerprints = {
+        subprocess.run(
+            [sys.executable, "-c", code], env={**os.environ, "PYTHONHASHSEED": seed},
+            capture_output=True, text=True, check=True,
+        ).stdout
+        for seed in ("1", "2")
+    }
+    assert len(fingerprints) == 1
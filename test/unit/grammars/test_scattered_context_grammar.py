@@ -1,3 +1,6 @@
+import random
+from collections import Counter
+
 import pytest
 
 from grammarlab.core.common import NonTerminal
@@ -19,6 +22,9 @@ def test_find_next():
     assert ScatteredContextRule.find_next(index=index, string_position=1, last=-1, symbol="A") == 1
     assert ScatteredContextRule.find_next(index=index, string_position=1, last=1, symbol="A") == 2
     assert ScatteredContextRule.find_next(index=index, string_position=1, last=2, symbol="A") == -1
+    assert ScatteredContextRule.find_next(index=index, string_position=20, last=-1, symbol="A") == -1
+    assert ScatteredContextRule.find_next(index=index, string_position=0, last=-1, symbol="B") == -1
+    assert "B" not in index
 
 @pytest.mark.parametrize(
     "string,rule,expected",
@@ -90,3 +96,34 @@ def test_derive():
     language = list(grammar.derive(10))
     control_language = [C(S([T("a")]*i)) for i in range(1, 11)]
     assert language == control_language
+
+
+@pytest.mark.parametrize(
+    "string,lhs",
+    [
+        (S([NonTerminal("A"), NonTerminal("A"), NonTerminal("A")]), [NonTerminal("B")]),
+        (S([NonTerminal("A"), NonTerminal("A"), NonTerminal("A")]), [NonTerminal("A"), NonTerminal("A")]),
+        (
+            S([NonTerminal("A"), NonTerminal("A"), NonTerminal("B"), NonTerminal("C"), NonTerminal("C")]),
+            [NonTerminal("A"), NonTerminal("B"), NonTerminal("C")]
+        ),
+        (S([NonTerminal("A")] * 8 + [NonTerminal("B")] * 4), [NonTerminal("A")] * 3 + [NonTerminal("B")] * 2),
+        (S([NonTerminal("A"), NonTerminal("B")] * 5), [NonTerminal("B"), NonTerminal("A"), NonTerminal("B")]),
+    ]
+)
+def test_count_matches(string, lhs):
+    rule = ScatteredContextRule(lhs, [S([])] * len(lhs))
+    assert rule.count_matches(string) == len(list(rule.match(string)))
+
+
+def test_sample_match():
+    string = S([NonTerminal("A"), NonTerminal("B")] * 4)
+    rule = ScatteredContextRule([NonTerminal("B"), NonTerminal("A"), NonTerminal("B")], [S([])] * 3)
+    matches = [tuple(match) for match in rule.match(string)]
+
+    rng = random.Random(0)
+    samples = Counter(tuple(rule.sample_match(string, rng)) for _ in range(len(matches) * 200))
+    assert set(samples) == set(matches)
+    assert min(samples.values()) > 100
+
+    assert rule.sample_match(S([NonTerminal("B"), NonTerminal("B")]), rng) is None
@@ -1,8 +1,11 @@
+from grammarlab.grammars import CF
 from grammarlab.grammars.pc_grammar_system import PCConfiguration as PCConf
 from grammarlab.grammars.phrase_grammar import PhraseConfiguration as PhraseConf
+from grammarlab.grammars.phrase_grammar import canonical_order
 from grammarlab.transformations.accept_substring import (
     N,
     T,
+    TranslateToOrigin,
     communication_left_to_right,
     copy_after_finish,
     finish_from_left_to_right,
@@ -74,3 +77,20 @@ def test_communication_left_to_right():
     assert communication_left_to_right(
         PCConf([None, PhraseConf(state + delimiter.terminal + terminal.terminal + ignore.terminal)])
     )
+
+
+def test_translate_to_origin_fingerprint():
+    def translated(origin_filter):
+        grammar = CF({"S"}, {"a"}, [("S", "aS"), ("S", "a")], "S")
+        grammar.set_filter(TranslateToOrigin(origin_filter))
+        return grammar
+
+    assert translated(canonical_order).fingerprint == translated(canonical_order).fingerprint
+    assert translated(canonical_order).fingerprint != translated(finish_part_before_separator).fingerprint
+    assert translated(canonical_order).fingerprint_is_stable
+
+    # wrapped filters with the same name are told apart, but their fingerprints are not stable
+    short = translated(lambda configuration: len(configuration.sential_form) < 3)
+    long = translated(lambda configuration: len(configuration.sential_form) > 3)
+    assert short.fingerprint != long.fingerprint
+    assert not short.fingerprint_is_stable
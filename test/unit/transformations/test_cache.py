@@ -0,0 +1,85 @@
+import pytest
+
+from grammarlab.core import config
+from grammarlab.examples.kuruda_normal_form import grammar
+from grammarlab.grammars import CF, PhraseGrammar
+from grammarlab.transformations.cache import cached_transformation
+from grammarlab.transformations.pcgs_pscg_re_equivalence import construct_grammar
+
+calls = []
+
+
+@cached_transformation("reversed", version=1, ignore=["verbose"])
+def reverse_rules(grammar, suffix="", verbose=False):
+    calls.append(grammar)
+    return CF(
+        {str(symbol) for symbol in grammar.non_terminals},
+        {str(symbol) for symbol in grammar.terminals},
+        [(str(rule.lhs), str(rule.rhs)[::-1].replace(" ", "") + suffix) for rule in grammar.rules],
+        str(grammar.start_symbol),
+    )
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "TRANSFORMATION_CACHE", str(tmp_path))
+    calls.clear()
+    return tmp_path
+
+
+def test_disabled(tmp_path):
+    calls.clear()
+    reverse_rules(grammar)
+    reverse_rules(grammar)
+    assert len(calls) == 2
+    assert not list(tmp_path.iterdir())
+
+
+def test_cached_transformation(cache):
+    result = reverse_rules(grammar)
+    loaded = reverse_rules(grammar, verbose=True)
+    assert len(calls) == 1
+    assert loaded is not result
+    assert sorted(map(str, loaded.rules)) == sorted(map(str, result.rules))
+
+    reverse_rules(grammar, "a")
+    reverse_rules(grammar, suffix="a")
+    assert len(calls) == 2
+    reverse_rules(PhraseGrammar(grammar.non_terminals, grammar.terminals, grammar.rules[::-1], grammar.start_symbol))
+    assert len(calls) == 2
+    assert len(list(cache.iterdir())) == 2
+
+
+def test_corrupted_file(cache):
+    reverse_rules(grammar)
+    for path in cache.iterdir():
+        path.write_bytes(b"corrupted")
+    reverse_rules(grammar)
+    assert len(calls) == 2
+
+
+def test_unpicklable_result(cache):
+    @cached_transformation("with_filter")
+    def with_filter(grammar):
+        result = reverse_rules(grammar)
+        result.set_filter(lambda configuration: True)
+        return result
+
+    with_filter(grammar)
+    assert [path.name.split("-")[0] for path in cache.iterdir()] == ["reversed"]
+
+
+def test_grammar_with_unstable_fingerprint(cache):
+    filtered = CF({"S"}, {"a"}, [("S", "aS"), ("S", "a")], "S")
+    filtered.set_filter(lambda configuration: True)
+    reverse_rules(filtered)
+    reverse_rules(filtered)
+    assert len(calls) == 2
+    assert not list(cache.iterdir())
+
+
+def test_construct_grammar(cache):
+    expected = [(str(configuration), configuration.depth) for configuration in construct_grammar(grammar).derive(20)]
+    cached = construct_grammar(grammar)
+    assert cached.filters
+    assert [(str(configuration), configuration.depth) for configuration in cached.derive(20)] == expected
@@ -1,3 +1,7 @@
+import io
+
+from rich.console import Console
+
 from grammarlab.core.common import NonTerminal, Terminal
 from grammarlab.grammars import CF
 from grammarlab.transformations.chomsky_normal_form import (
@@ -10,6 +14,13 @@ from grammarlab.transformations.chomsky_normal_form import (
     remove_useless_symbols,
     transform_to_chomsky,
 )
+from grammarlab.transformations.trace import (
+    GRAMMAR,
+    SECTION,
+    RecordingTracer,
+    RichTracer,
+    TraceEvent,
+)
 
 P = [
     ("S", "aAB"),
@@ -81,3 +92,19 @@ def test_chomsky():
             )
         )
     assert {str(sentence.sential_form) for sentence in new_grammar.derive(10)} == {"a a b", "a a", "a b", "a"}
+
+
+def test_chomsky_trace(capsys):
+    transform_to_chomsky(grammar)
+    assert capsys.readouterr().out == ""
+
+    tracer = RecordingTracer()
+    transform_to_chomsky(grammar, tracer=tracer)
+    assert tracer.events[0].kind == SECTION
+    assert tracer.events[-1] == TraceEvent(GRAMMAR, "Final grammar", {"grammar": tracer.events[-1].data["grammar"]})
+    removed = [event.data["rule"] for event in tracer.events if event.kind == "rule_removed"]
+    assert any(len(rule.rhs) == 0 for rule in removed)
+
+    console = Console(file=io.StringIO(), width=120)
+    transform_to_chomsky(grammar, tracer=RichTracer(console))
+    assert "Final grammar" in console.file.getvalue()
@@ -1,7 +1,9 @@
+from grammarlab.examples import kuruda_normal_form
 from grammarlab.grammars.scattered_context_grammar import SCGConfiguration as Conf
 from grammarlab.transformations.derivation_sequence_in_scg import (
     N,
     T,
+    construct_grammar,
     finish_left_to_right,
     non_terminal_before_working_space,
     symbol_not_copied,
@@ -40,3 +42,16 @@ def test_finish_left_to_right():
     assert finish_left_to_right(Conf(state + terminal + left + non_terminal))
     assert finish_left_to_right(Conf(state + terminal + left + terminal + non_terminal))
     assert not finish_left_to_right(Conf(state + terminal + left + non_terminal + terminal))
+
+
+def test_terminals_in_non_terminal_alphabet_are_not_dead():
+    grammar = construct_grammar(kuruda_normal_form.grammar)
+    assert T("a").terminal in grammar.non_terminals
+    assert not grammar.dead_symbols()
+
+    sentences = [str(configuration.sential_form) for configuration in grammar.derive(45)]
+    assert "* * a * # a * * *" in sentences
+    assert sentences == [
+        str(configuration.sential_form) for configuration in grammar.derive(45, prune_dead_symbols=False)
+    ]
+    assert len(sentences) == 5
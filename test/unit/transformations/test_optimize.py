@@ -0,0 +1,83 @@
+import pytest
+
+from grammarlab.core.common import NonTerminal, String, Terminal
+from grammarlab.core.grammar import RuleSet
+from grammarlab.examples import kuruda_normal_form
+from grammarlab.grammars import CF, ContextFreeRule
+from grammarlab.grammars.pc_grammar_system import PCGrammarSystem
+from grammarlab.grammars.scattered_context_grammar import (
+    ScatteredContextGrammar,
+    ScatteredContextRule,
+)
+from grammarlab.transformations.derivation_sequence_in_scg import construct_grammar
+from grammarlab.transformations.optimize import optimize
+from grammarlab.transformations.trace import RecordingTracer
+
+S, A, B, C = NonTerminal("S"), NonTerminal("A"), NonTerminal("B"), NonTerminal("C")
+a, b = Terminal("a"), Terminal("b")
+
+
+def test_rule_set():
+    rules = RuleSet([ContextFreeRule(String([S]), String([a])), ContextFreeRule(String([S]), String([a]))])
+    assert len(rules) == 1
+    assert not rules.add(ContextFreeRule(String([S]), String([a])))
+    assert rules.add(ContextFreeRule(String([S]), String([b])))
+    assert ContextFreeRule(String([S]), String([b])) in rules
+
+
+def test_optimize():
+    grammar = CF(
+        {"S", "A", "B", "C", "D"},
+        {"a", "b"},
+        [
+            ("S", "A"), ("A", "B"), ("B", "S"), ("A", "aAb"), ("S", "ab"), ("S", "ab"),
+            ("C", "a"), ("S", "D"), ("D", "aD"),
+        ],
+        "S",
+    )
+    tracer = RecordingTracer()
+    optimized = optimize(grammar, tracer)
+
+    assert sorted(map(str, optimized.rules)) == ["S -> a S b", "S -> a b"]
+    assert set(optimized.non_terminals) == {S, NonTerminal("C"), NonTerminal("D")}
+    assert tracer.kinds().count("rule_removed") == 7
+    assert "unit_cycle" in tracer.kinds()
+    sentences = {str(configuration) for configuration in optimized.derive(depth=4)}
+    expected = {str(configuration) for configuration in grammar.derive(depth=8) if len(configuration.sential_form) <= 8}
+    assert sentences == expected
+
+
+def test_optimize_scattered_context():
+    grammar = ScatteredContextGrammar(
+        [S, A, B, C],
+        [a, b],
+        [
+            ScatteredContextRule([S], [String([A, B])]),
+            ScatteredContextRule([A, B], [String([a, A]), String([b, B])]),
+            ScatteredContextRule([A, B], [String([a]), String([b])]),
+            ScatteredContextRule([A, B], [String([a]), String([b])]),
+            ScatteredContextRule([A, C], [String([a]), String([b])]),
+        ],
+        S,
+    )
+    optimized = optimize(grammar)
+    assert optimized.__class__ is ScatteredContextGrammar
+    assert len(optimized.rules) == 3
+    assert optimize(optimized) is optimized
+
+
+def test_optimize_keeps_sentences_of_transformed_grammar():
+    # non-terminal alphabet of transformed grammar contains terminals
+    grammar = construct_grammar(kuruda_normal_form.grammar)
+    optimized = optimize(grammar)
+    assert len(optimized.rules) < len(grammar.rules)
+    sentences = sorted(str(configuration.sential_form) for configuration in grammar.derive(60))
+    assert sentences
+    assert sorted(str(configuration.sential_form) for configuration in optimized.derive(60)) == sentences
+
+
+def test_optimize_pc_grammar_system():
+    component = ScatteredContextGrammar([S], [a], [ScatteredContextRule([S], [String([a])])], S)
+    system = PCGrammarSystem(comumunication_symbols=[NonTerminal("1")], components=[component])
+    with pytest.raises(ValueError):
+        optimize(system)